@@ -0,0 +1 @@
+"""Benchmarks für die EVCC Scheduler Integration (siehe die einzelnen Module)."""
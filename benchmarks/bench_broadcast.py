@@ -0,0 +1,149 @@
+"""Fan-out-Latenz von EvccWebSocketAPI.broadcast mit vielen simulierten Clients.
+
+Vergleicht das frühere sequentielle Senden (await client.send nacheinander)
+mit den Sende-Queues pro Client. Ein Teil der Clients ist absichtlich langsam
+(z.B. ein Dashboard-Tablet im WLAN). Gemessen wird pro Broadcast:
+
+* caller_ms: wie lange der Aufrufer (Service-Call) im Broadcast blockiert
+* fast_fanout_ms: bis alle schnellen Clients die Nachricht haben
+
+Benötigt eine Umgebung mit Home Assistant (wie für die Integration selbst).
+
+Aufruf aus dem Repo-Root:  python -m benchmarks.bench_broadcast --clients 200 --slow 2
+"""
+import argparse
+import asyncio
+import json
+import platform
+import time
+from typing import Any, Dict, List
+
+from custom_components.evcc_scheduler import codec
+from custom_components.evcc_scheduler.websocket_api import EvccWebSocketAPI
+
+
+class FakeClient:
+    """Simulierter Card-Client mit fester Sendelatenz."""
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+        self.received: List[float] = []
+        self._closed = asyncio.Event()
+
+    async def send(self, msg: str) -> None:
+        await asyncio.sleep(self.latency)
+        self.received.append(time.perf_counter())
+
+    async def close(self) -> None:
+        self._closed.set()
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        await self._closed.wait()
+        raise StopAsyncIteration
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _summary(values: List[float]) -> Dict[str, Any]:
+    return {
+        "p50_ms": round(_percentile(values, 50) * 1000, 3),
+        "p99_ms": round(_percentile(values, 99) * 1000, 3),
+        "max_ms": round(max(values) * 1000, 3),
+    }
+
+
+def _build_clients(clients: int, slow: int, fast_latency: float, slow_latency: float) -> List[FakeClient]:
+    return [FakeClient(slow_latency if i < slow else fast_latency) for i in range(clients)]
+
+
+async def _sequential_broadcast(clients: List[FakeClient], data: Dict[str, Any]) -> None:
+    """Das frühere Verhalten: ein Client nach dem anderen."""
+    msg = codec.dumps(data)
+    for client in clients:
+        await client.send(msg)
+
+
+async def _wait_for(clients: List[FakeClient], count: int) -> float:
+    while any(len(client.received) < count for client in clients):
+        await asyncio.sleep(0.0005)
+    return max(client.received[count - 1] for client in clients)
+
+
+async def _bench_sequential(clients: List[FakeClient], slow: int, messages: int) -> Dict[str, Any]:
+    fast = clients[slow:]
+    caller, fanout = [], []
+    for i in range(messages):
+        started = time.perf_counter()
+        await _sequential_broadcast(clients, {"type": "plans_updated", "seq": i})
+        caller.append(time.perf_counter() - started)
+        fanout.append(await _wait_for(fast, i + 1) - started)
+    return {"caller": _summary(caller), "fast_fanout": _summary(fanout), "evicted": 0}
+
+
+async def _bench_queued(clients: List[FakeClient], slow: int, messages: int, max_queue: int) -> Dict[str, Any]:
+    api = EvccWebSocketAPI(None, max_queue=max_queue)
+    handlers = [asyncio.create_task(api.handle_client(client)) for client in clients]
+    await asyncio.sleep(0)
+
+    fast = clients[slow:]
+    caller, fanout = [], []
+    for i in range(messages):
+        started = time.perf_counter()
+        await api.broadcast({"type": "plans_updated", "seq": i})
+        caller.append(time.perf_counter() - started)
+        fanout.append(await _wait_for(fast, i + 1) - started)
+
+    evicted = api.evicted
+    await api.close_all()
+    await asyncio.gather(*handlers, return_exceptions=True)
+    return {"caller": _summary(caller), "fast_fanout": _summary(fanout), "evicted": evicted}
+
+
+async def run(clients: int, slow: int, messages: int, fast_latency: float, slow_latency: float, max_queue: int) -> Dict[str, Any]:
+    sequential = await _bench_sequential(
+        _build_clients(clients, slow, fast_latency, slow_latency), slow, messages
+    )
+    queued = await _bench_queued(
+        _build_clients(clients, slow, fast_latency, slow_latency), slow, messages, max_queue
+    )
+    return {
+        "benchmark": "broadcast",
+        "python": platform.python_version(),
+        "clients": clients,
+        "slow_clients": slow,
+        "messages": messages,
+        "sequential": sequential,
+        "queued": queued,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--slow", type=int, default=1, help="Anzahl langsamer Clients")
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--fast-latency", type=float, default=0.0005, help="Sekunden pro send() schneller Clients")
+    parser.add_argument("--slow-latency", type=float, default=0.25, help="Sekunden pro send() langsamer Clients")
+    parser.add_argument("--max-queue", type=int, default=32)
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON-Datei schreiben")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(
+        args.clients, args.slow, args.messages, args.fast_latency, args.slow_latency, args.max_queue,
+    ))
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
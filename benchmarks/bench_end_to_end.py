@@ -0,0 +1,183 @@
+"""End-to-End-Latenz gegen einen lokalen Fake-EVCC-Server.
+
+Misst zwei Strecken über den echten Stack (EvccApiClient, EvccWebsocketClient,
+EvccCoordinator, Services):
+
+* plan_change_to_coordinator: Plan-Änderung in EVCC (WS-Broadcast) bis die
+  Coordinator-Daten den neuen Wert enthalten
+* service_call_to_post: Aufruf von evcc_scheduler.set_repeating_plan bis der
+  POST bei EVCC eintrifft
+
+Der WebSocket wird wie in async_setup_entry angebunden; gemessen wird im
+Modus "push". Zu beiden Strecken wird die Anzahl der /api/state-Abrufe
+ausgegeben (im Push-Modus erwartet: 0).
+
+Das Ergebnis wird als JSON ausgegeben (optional zusätzlich in --output), damit
+Regressionen maschinell verfolgt werden können. Benötigt eine Umgebung mit
+Home Assistant (wie für die Integration selbst).
+
+Aufruf aus dem Repo-Root:  python -m benchmarks.bench_end_to_end --samples 200
+"""
+import argparse
+import asyncio
+import json
+import platform
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import frame
+
+from custom_components.evcc_scheduler.api import EvccApiClient
+from custom_components.evcc_scheduler.const import DOMAIN, POLL_MODE_PUSH
+from custom_components.evcc_scheduler.coordinator import EvccCoordinator
+from custom_components.evcc_scheduler.routing import EvccVehicleRouter
+from custom_components.evcc_scheduler.services import async_setup_services
+from custom_components.evcc_scheduler.websocket_client import EvccWebsocketClient
+
+from .fake_evcc import FakeEvcc
+
+VEHICLE_ID = "db:1"
+HOST = "127.0.0.1"
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    rank = max(int(round(pct / 100 * len(ordered) + 0.5)) - 1, 0)
+    return ordered[min(rank, len(ordered) - 1)]
+
+
+def _summary(latencies: List[float]) -> Dict[str, Any]:
+    return {
+        "samples": len(latencies),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 3),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 3),
+        "max_ms": round(max(latencies) * 1000, 3),
+    }
+
+
+async def _wait_for_soc(coordinator: EvccCoordinator, soc: int, timeout: float) -> float:
+    """Warte, bis der Coordinator den SOC-Wert von Plan 1 übernommen hat."""
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+
+    def _check() -> None:
+        plans = (coordinator.data or {}).get("vehicles", {}).get(VEHICLE_ID, {}).get("repeatingPlans", [])
+        if plans and plans[0].soc == soc and not done.done():
+            done.set_result(time.perf_counter())
+
+    unsub = coordinator.async_add_listener(_check)
+    try:
+        return await asyncio.wait_for(done, timeout)
+    finally:
+        unsub()
+
+
+async def _bench_plan_change(server: FakeEvcc, coordinator: EvccCoordinator, samples: int) -> List[float]:
+    latencies = []
+    base_plan = server.state["vehicles"][VEHICLE_ID]["repeatingPlans"][0]
+    for i in range(samples):
+        soc = 10 + i % 90
+        if coordinator.data["vehicles"][VEHICLE_ID]["repeatingPlans"][0].soc == soc:
+            soc += 1
+        waiter = asyncio.ensure_future(_wait_for_soc(coordinator, soc, timeout=10))
+        started = await server.change_plans(VEHICLE_ID, [{**base_plan, "soc": soc}])
+        latencies.append(await waiter - started)
+    return latencies
+
+
+async def _bench_service_call(hass: HomeAssistant, server: FakeEvcc, samples: int) -> List[float]:
+    latencies = []
+    for i in range(samples):
+        before = len(server.post_times)
+        started = time.perf_counter()
+        await hass.services.async_call(
+            DOMAIN,
+            "set_repeating_plan",
+            {"vehicle_id": VEHICLE_ID, "plan_index": 1, "soc": 10 + i % 90},
+            blocking=True,
+        )
+        if len(server.post_times) > before:
+            latencies.append(server.post_times[before] - started)
+    return latencies
+
+
+async def run(samples: int) -> Dict[str, Any]:
+    server = FakeEvcc()
+    await server.start(HOST)
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        frame.async_setup(hass)
+
+        api = EvccApiClient(HOST, server.port)
+        coordinator = EvccCoordinator(hass, api, poll_interval=3600)
+        await coordinator.async_refresh()
+        hass.data.setdefault(DOMAIN, {})["benchmark"] = coordinator
+        # Services lösen vehicle_id wie im Setup über den Routing-Index auf
+        router = hass.data.setdefault("evcc_scheduler_router", EvccVehicleRouter())
+        remove_route = router.async_add_entry("benchmark", coordinator)
+
+        ws = EvccWebsocketClient(
+            HOST,
+            server.port,
+            coordinator.async_handle_ws_message,
+            coordinator.async_handle_ws_reconnect,
+            metrics=coordinator.metrics,
+            status_callback=coordinator.async_handle_ws_status,
+        )
+        await ws.connect()
+        # Wie in async_setup_entry: Coordinator kennt den WS-Client und schaltet auf Push
+        coordinator.ws = ws
+        unsub_watchdog = coordinator.async_start_ws_watchdog()
+        while not server.clients:
+            await asyncio.sleep(0.01)
+
+        await async_setup_services(hass)
+
+        try:
+            # Gemessen wird der Push-Pfad (Cache ohne erzwungenen Fetch vor dem POST)
+            if coordinator.async_update_poll_mode(refresh=False) != POLL_MODE_PUSH:
+                raise RuntimeError(f"Coordinator not in push mode ({coordinator.poll_mode})")
+            state_requests = server.state_requests
+            plan_change = await _bench_plan_change(server, coordinator, samples)
+            plan_change_fetches = server.state_requests - state_requests
+            state_requests = server.state_requests
+            service_call = await _bench_service_call(hass, server, samples)
+            service_call_fetches = server.state_requests - state_requests
+            poll_mode = coordinator.poll_mode
+        finally:
+            unsub_watchdog()
+            remove_route()
+            await ws.disconnect()
+            await coordinator.refresh_scheduler.async_shutdown()
+            await api.close()
+            await server.stop()
+            await hass.async_stop(force=True)
+
+    return {
+        "benchmark": "end_to_end",
+        "python": platform.python_version(),
+        "poll_mode": poll_mode,
+        "plan_change_to_coordinator": {**_summary(plan_change), "state_fetches": plan_change_fetches},
+        "service_call_to_post": {**_summary(service_call), "state_fetches": service_call_fetches},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--samples", type=int, default=100)
+    parser.add_argument("--output", help="Ergebnis zusätzlich als JSON-Datei schreiben")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.samples))
+    text = json.dumps(result, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
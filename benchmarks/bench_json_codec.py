@@ -0,0 +1,58 @@
+"""Benchmark: CPU pro Frame/Payload mit Standard-json vs. aktivem Codec (orjson).
+
+Misst Dekodieren eingehender WS-Frames, Dekodieren eines /api/state-Payloads
+und Enkodieren eines Broadcasts an die Custom-Card.
+
+Aufruf aus dem Repo-Root:  python -m benchmarks.bench_json_codec
+"""
+import json
+import time
+from pathlib import Path
+
+from custom_components.evcc_scheduler import codec
+
+MESSAGES_FILE = Path(__file__).parent / "data" / "ws_messages.jsonl"
+ROUNDS = 500
+
+
+def _state_payload() -> str:
+    plans = [
+        {"time": "07:00", "weekdays": [1, 2, 3, 4, 5], "soc": 80, "active": True, "tz": "Europe/Berlin", "precondition": 0},
+        {"time": "09:30", "weekdays": [0, 6], "soc": 60, "active": False, "tz": "Europe/Berlin", "precondition": 1},
+    ]
+    return json.dumps({
+        "vehicles": {f"db:{i}": {"title": f"Car {i}", "repeatingPlans": plans} for i in range(1, 4)},
+        "loadpoints": [{"chargePower": 11000.0, "mode": "pv", "phasesActive": 3} for _ in range(2)],
+        "forecast": {
+            "solar": [{"ts": f"2026-10-18T{h % 24:02d}:00:00Z", "val": h * 12.5} for h in range(192)],
+            "grid": [{"start": h, "end": h + 1, "price": 0.25 + h / 1000} for h in range(192)],
+        },
+    })
+
+
+def _time(func, items, rounds: int) -> float:
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for item in items:
+            func(item)
+    return (time.perf_counter() - started) / (rounds * len(items))
+
+
+def main() -> None:
+    frames = [line for line in MESSAGES_FILE.read_text(encoding="utf-8").splitlines() if line.strip()]
+    state = [_state_payload()]
+    broadcast = [{"type": "plans_updated", "vehicle_id": "db:1", "plans": codec.loads(state[0])["vehicles"]["db:1"]["repeatingPlans"]}]
+
+    print(f"codec backend: {codec.BACKEND}")
+    for label, items, rounds, baseline, candidate in (
+        ("WS frame decode", frames, ROUNDS, json.loads, codec.loads),
+        ("state decode", state, ROUNDS // 5, json.loads, codec.loads),
+        ("broadcast encode", broadcast, ROUNDS * 20, json.dumps, codec.dumps),
+    ):
+        base = _time(baseline, items, rounds)
+        fast = _time(candidate, items, rounds)
+        print(f"{label:<17} json {base * 1e6:8.2f} µs  codec {fast * 1e6:8.2f} µs  saved {(base - fast) * 1e6:8.2f} µs")
+
+
+if __name__ == "__main__":
+    main()
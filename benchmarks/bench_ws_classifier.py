@@ -0,0 +1,64 @@
+"""Durchsatz-Benchmark: WS-Klassifizierung alt (Substring + re.match) vs. kompiliert.
+
+Der Nachrichten-Mix in data/ws_messages.jsonl bildet das typische Verhältnis
+während eines Ladevorgangs nach (überwiegend Leistungs-/Zählerwerte, selten
+Plan- oder Fahrzeugänderungen).
+
+Aufruf aus dem Repo-Root:  python -m benchmarks.bench_ws_classifier
+"""
+import json
+import re
+import time
+from pathlib import Path
+
+from custom_components.evcc_scheduler.ws_classifier import CATEGORY_IGNORE, EvccMessageClassifier
+
+MESSAGES_FILE = Path(__file__).parent / "data" / "ws_messages.jsonl"
+ROUNDS = 2000
+
+
+def _legacy_is_relevant(data: dict) -> bool:
+    """Vorherige Implementierung aus EvccWebsocketClient._is_relevant_update."""
+    if not isinstance(data, dict):
+        return False
+    if "vehicles" in data and "loadpoints" in data:
+        return True
+    path = data.get("path", "")
+    if path and re.match(r"^/api/vehicles/[^/]+/plan/repeating", path) is not None:
+        return True
+    if "/vehicles/" in path and ("title" in path or "name" in path):
+        return True
+    if "vehicleName" in path or "activeVehicle" in path:
+        return True
+    return False
+
+
+def _load_messages() -> list[dict]:
+    with MESSAGES_FILE.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def _run(label: str, messages: list[dict], func) -> float:
+    started = time.perf_counter()
+    relevant = 0
+    for _ in range(ROUNDS):
+        for data in messages:
+            if func(data):
+                relevant += 1
+    elapsed = time.perf_counter() - started
+    total = ROUNDS * len(messages)
+    print(f"{label:<12} {total / elapsed:12,.0f} msg/s  ({relevant // ROUNDS} relevant per round)")
+    return elapsed
+
+
+def main() -> None:
+    messages = _load_messages()
+    classifier = EvccMessageClassifier()
+    print(f"messages per round: {len(messages)}, rounds: {ROUNDS}")
+    legacy = _run("legacy", messages, _legacy_is_relevant)
+    compiled = _run("compiled", messages, lambda data: classifier.classify(data)[0] != CATEGORY_IGNORE)
+    print(f"speedup: {legacy / compiled:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
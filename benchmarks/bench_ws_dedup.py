@@ -0,0 +1,74 @@
+"""Microbenchmark: WS-Dedup per json.dumps-Signatur vs. Hash-Tabelle pro Pfad.
+
+Jeder Frame wird pro Durchlauf frisch aus bytes dekodiert, wie beim echten
+WebSocket; sonst wäre der str-Hash von CPython bereits gecacht und die
+Hash-Tabelle würde zu gut abschneiden.
+
+Aufruf aus dem Repo-Root:  python -m benchmarks.bench_ws_dedup
+"""
+import json
+import time
+
+from custom_components.evcc_scheduler.websocket_client import (
+    STATE_DEDUP_KEY,
+    EvccMessageDeduplicator,
+)
+
+
+def _build_frames() -> list[bytes]:
+    plans = [
+        {"time": "07:00", "weekdays": [1, 2, 3, 4, 5], "soc": 80, "active": True, "tz": "Europe/Berlin", "precondition": 0},
+        {"time": "09:30", "weekdays": [0, 6], "soc": 60, "active": False, "tz": "Europe/Berlin", "precondition": 1},
+    ]
+    plan_a = json.dumps({"path": "/api/vehicles/db:1/plan/repeating", "value": plans})
+    plan_b = json.dumps({"path": "/api/vehicles/db:2/plan/repeating", "value": plans[:1]})
+    title = json.dumps({"path": "/api/vehicles/db:1/title", "value": "Model 3"})
+    full_state = json.dumps({
+        "vehicles": {"db:1": {"title": "Model 3", "repeatingPlans": plans}},
+        "loadpoints": [{"chargePower": 11000, "mode": "pv"}],
+        "forecast": {"solar": [{"ts": i, "val": i * 1.5} for i in range(500)]},
+    })
+    # Abwechselnde Duplikate (A, B, A, B, ...) plus gelegentlicher Vollstate
+    frames = [plan_a, plan_b, title, plan_a, plan_b, full_state, plan_a, plan_b] * 250
+    return [frame.encode("utf-8") for frame in frames]
+
+
+def _bench_signature(frames: list[bytes]) -> tuple[float, int]:
+    last = None
+    suppressed = 0
+    started = time.perf_counter()
+    for frame in frames:
+        raw = frame.decode("utf-8")
+        data = json.loads(raw)
+        signature = json.dumps(data, sort_keys=True)
+        if signature == last:
+            suppressed += 1
+            continue
+        last = signature
+    return time.perf_counter() - started, suppressed
+
+
+def _bench_dedup(frames: list[bytes]) -> tuple[float, int]:
+    dedup = EvccMessageDeduplicator()
+    started = time.perf_counter()
+    for frame in frames:
+        # Neues str-Objekt pro Frame → Hash wird wirklich berechnet
+        raw = frame.decode("utf-8")
+        data = json.loads(raw)
+        key = data.get("path") or STATE_DEDUP_KEY
+        if not dedup.is_duplicate(key, raw):
+            dedup.remember(key, raw)
+    return time.perf_counter() - started, dedup.hits
+
+
+def main() -> None:
+    frames = _build_frames()
+    old_time, old_suppressed = _bench_signature(frames)
+    new_time, new_suppressed = _bench_dedup(frames)
+    print(f"frames:            {len(frames)}")
+    print(f"json.dumps sig:    {old_time * 1e6 / len(frames):8.2f} µs/frame, {old_suppressed} suppressed")
+    print(f"per-path hash:     {new_time * 1e6 / len(frames):8.2f} µs/frame, {new_suppressed} suppressed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Lokaler aiohttp-Ersatz für EVCC (nur die vom Scheduler genutzten Endpunkte).
+
+Stellt /api/state (inkl. jq-Projektion), /api/vehicles/{id}/plan/repeating
+und /ws bereit und merkt sich, wann POSTs eingetroffen sind, damit
+Benchmarks Latenzen über den kompletten Stack messen können.
+"""
+import asyncio
+import copy
+import json
+import time
+from typing import Any, Dict, List
+
+from aiohttp import WSMsgType, web
+
+
+def default_state(vehicles: int = 2, forecast_len: int = 192) -> Dict[str, Any]:
+    plan = {"time": "07:00", "weekdays": [1, 2, 3, 4, 5], "soc": 80, "active": True, "tz": "Europe/Berlin", "precondition": 0}
+    return {
+        "vehicles": {
+            f"db:{i}": {"title": f"Car {i}", "repeatingPlans": [dict(plan)]}
+            for i in range(1, vehicles + 1)
+        },
+        "loadpoints": [{"chargePower": 0.0, "mode": "pv", "vehicleName": "db:1"}],
+        "forecast": {"solar": [{"ts": i, "val": i * 1.5} for i in range(forecast_len)]},
+    }
+
+
+class FakeEvcc:
+    """Minimaler EVCC-Server für Benchmarks."""
+
+    def __init__(self, state: Dict[str, Any] | None = None) -> None:
+        self.state = state if state is not None else default_state()
+        self.clients: set[web.WebSocketResponse] = set()
+        self.post_times: List[float] = []
+        self.state_requests = 0
+        self._runner: web.AppRunner | None = None
+        self.port: int | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/api/state", self._handle_state)
+        self.app.router.add_post("/api/vehicles/{vehicle_id}/plan/repeating", self._handle_set_plans)
+        self.app.router.add_get("/ws", self._handle_ws)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop(self) -> None:
+        for client in list(self.clients):
+            await client.close()
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def change_plans(self, vehicle_id: str, plans: List[Dict[str, Any]]) -> float:
+        """Simuliere eine Plan-Änderung direkt in EVCC; gibt den Zeitstempel zurück."""
+        self.state["vehicles"][vehicle_id]["repeatingPlans"] = copy.deepcopy(plans)
+        started = time.perf_counter()
+        await self._broadcast({"path": f"/api/vehicles/{vehicle_id}/plan/repeating", "value": plans})
+        return started
+
+    async def _broadcast(self, message: Dict[str, Any]) -> None:
+        payload = json.dumps(message)
+        await asyncio.gather(*(client.send_str(payload) for client in list(self.clients)), return_exceptions=True)
+
+    async def _handle_state(self, request: web.Request) -> web.Response:
+        self.state_requests += 1
+        if request.query.get("jq"):
+            return web.json_response({"vehicles": self.state["vehicles"]})
+        return web.json_response(self.state)
+
+    async def _handle_set_plans(self, request: web.Request) -> web.Response:
+        self.post_times.append(time.perf_counter())
+        vehicle_id = request.match_info["vehicle_id"]
+        if vehicle_id not in self.state["vehicles"]:
+            return web.json_response({"error": "vehicle not found"}, status=404)
+        plans = await request.json()
+        self.state["vehicles"][vehicle_id]["repeatingPlans"] = plans
+        await self._broadcast({"path": f"/api/vehicles/{vehicle_id}/plan/repeating", "value": plans})
+        return web.json_response(plans)
+
+    async def _handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.clients.add(ws)
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.clients.discard(ws)
+        return ws
@@ -1,15 +1,46 @@
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from .api import EvccApiClient
 from .coordinator import EvccCoordinator
 from .websocket_client import EvccWebsocketClient
-from .websocket_api import EvccWebSocketAPI, async_register_ws_commands
+from .websocket_api import EvccUserView, EvccWebSocketAPI, async_register_ws_commands
 from .services import async_setup_services
-from .const import DOMAIN, DEFAULT_PORT, CONF_WEBSOCKET, DEFAULT_WEBSOCKET, CONF_WS_API, DEFAULT_WS_API, CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL
+from .profiler import EvccProfiler
+from .routing import EvccVehicleRouter
+from .const import DOMAIN, DEFAULT_PORT, CONF_WEBSOCKET, DEFAULT_WEBSOCKET, CONF_WS_API, DEFAULT_WS_API, CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL, CONF_PROJECTED_STATE, DEFAULT_PROJECTED_STATE, CONF_KEEP_ENTITIES, DEFAULT_KEEP_ENTITIES, CONF_SHARED_SESSION, DEFAULT_SHARED_SESSION
 import logging
 
 _LOGGER = logging.getLogger(__name__)
 
 # Platforms für Plan-Attribute
-PLATFORMS = ["switch", "time", "text", "number"]
+PLAN_PLATFORMS = ["switch", "time", "text", "number"]
+# Zusätzlich Diagnose-Sensoren für Laufzeit-Metriken
+PLATFORMS = [*PLAN_PLATFORMS, "sensor"]
+
+
+def _remove_registry_entries(hass, entry, keep_unique_ids=None) -> int:
+    """Entferne Registry-Einträge dieses Config-Entries.
+
+    Mit `keep_unique_ids` werden nur Plan-Entities entfernt, deren unique_id
+    nicht (mehr) zu einem Plan gehört; ohne werden alle Einträge entfernt.
+    """
+    from homeassistant.helpers.entity_registry import async_get
+
+    entity_registry = async_get(hass)
+    entities_to_remove = [
+        entity_id
+        for entity_id, entity_entry in entity_registry.entities.items()
+        if entity_entry.config_entry_id == entry.entry_id
+        and (
+            keep_unique_ids is None
+            or (entity_entry.domain in PLAN_PLATFORMS and entity_entry.unique_id not in keep_unique_ids)
+        )
+    ]
+
+    for entity_id in entities_to_remove:
+        entity_registry.async_remove(entity_id)
+        _LOGGER.debug("Removed entity from registry: %s", entity_id)
+
+    return len(entities_to_remove)
 
 async def async_setup_entry(hass, entry):
     """Richte die Integration ein"""
@@ -20,18 +51,30 @@ async def async_setup_entry(hass, entry):
     use_websocket = entry.data.get(CONF_WEBSOCKET, DEFAULT_WEBSOCKET)
     ws_api_enabled = entry.data.get(CONF_WS_API, DEFAULT_WS_API)
     poll_interval = entry.data.get(CONF_POLL_INTERVAL, DEFAULT_POLL_INTERVAL)
+    projected_state = entry.data.get(CONF_PROJECTED_STATE, DEFAULT_PROJECTED_STATE)
+    keep_entities = entry.data.get(CONF_KEEP_ENTITIES, DEFAULT_KEEP_ENTITIES)
+    shared_session = entry.data.get(CONF_SHARED_SESSION, DEFAULT_SHARED_SESSION)
+
+    # Ein Profiler für alle Einträge (cProfile kann nur einmal pro Thread laufen)
+    profiler = hass.data.setdefault("evcc_scheduler_profiler", EvccProfiler())
 
     # Erstelle API-Client
-    api = EvccApiClient(host, port)
+    # Optional die gemeinsame HTTP-Session von Home Assistant verwenden
+    session = async_get_clientsession(hass) if shared_session else None
+    api = EvccApiClient(host, port, projected_state, profiler=profiler, session=session)
     coordinator = EvccCoordinator(hass, api, poll_interval)
 
     # WebSocket nur verbinden wenn aktiviert
     if use_websocket:
-        async def websocket_update(data):
-            _LOGGER.debug("WebSocket update received, triggering coordinator refresh")
-            await coordinator.async_request_refresh()
-
-        ws = EvccWebsocketClient(host, port, websocket_update)
+        ws = EvccWebsocketClient(
+            host,
+            port,
+            coordinator.async_handle_ws_message,
+            coordinator.async_handle_ws_reconnect,
+            metrics=coordinator.metrics,
+            profiler=profiler,
+            status_callback=coordinator.async_handle_ws_status,
+        )
         try:
             await ws.connect()
             _LOGGER.info("EVCC WebSocket client connected for instant updates")
@@ -54,40 +97,46 @@ async def async_setup_entry(hass, entry):
     # Speichere Coordinator
     hass.data.setdefault(DOMAIN, {})[entry.entry_id] = coordinator
     coordinator.ws = ws
+    if ws is not None:
+        # Stummen WebSocket unabhängig vom (im Push-Modus langen) Poll-Intervall erkennen
+        entry.async_on_unload(coordinator.async_start_ws_watchdog())
 
     # Führe initialen Refresh durch (ladet alle Fahrzeuge/Pläne aus EVCC)
     # Dies ist die einzige Wahrheitsquelle - EVCC ist authorativ
     await coordinator.async_config_entry_first_refresh()
     _LOGGER.debug("Initial coordinator refresh completed")
+
+    # Routing vehicle_id → Eintrag für Services und WS-Kommandos (mehrere EVCC-Instanzen)
+    router = hass.data.setdefault("evcc_scheduler_router", EvccVehicleRouter())
+    entry.async_on_unload(router.async_add_entry(entry.entry_id, coordinator))
+
+    # Vorberechnete User-Ansicht für die WS-Kommandos der Custom-Card
+    coordinator.user_view = EvccUserView(coordinator, entry.entry_id)
+    entry.async_on_unload(coordinator.user_view.async_start())
     
     # Starte Switch-Platform
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
     # Registriere Services
     await async_setup_services(hass)
-    
-    # Registriere Shutdown-Handler für sauberes Cleanup
-    async def _async_shutdown(event):
-        """Cleanup bei Home Assistant Shutdown"""
-        _LOGGER.info("Home Assistant shutting down, cleaning up EVCC Scheduler")
-        from homeassistant.helpers.entity_registry import async_get
-        
-        entity_registry = async_get(hass)
-        entities_to_remove = [
-            entity_id
-            for entity_id, entity_entry in entity_registry.entities.items()
-            if entity_entry.config_entry_id == entry.entry_id
-        ]
-        
-        for entity_id in entities_to_remove:
-            entity_registry.async_remove(entity_id)
-        
-        if entities_to_remove:
-            _LOGGER.info("Removed %d entities from registry on shutdown", len(entities_to_remove))
-    
-    entry.async_on_unload(
-        hass.bus.async_listen_once("homeassistant_stop", _async_shutdown)
-    )
+
+    if keep_entities:
+        # Registry-Einträge bleiben erhalten; nur verwaiste Einträge (Plan in EVCC gelöscht) entfernen
+        removed = _remove_registry_entries(hass, entry, coordinator.plan_sync.unique_ids())
+        if removed:
+            _LOGGER.info("Pruned %d orphaned entities from registry", removed)
+    else:
+        # Registriere Shutdown-Handler für sauberes Cleanup
+        async def _async_shutdown(event):
+            """Cleanup bei Home Assistant Shutdown"""
+            _LOGGER.info("Home Assistant shutting down, cleaning up EVCC Scheduler")
+            removed = _remove_registry_entries(hass, entry)
+            if removed:
+                _LOGGER.info("Removed %d entities from registry on shutdown", removed)
+
+        entry.async_on_unload(
+            hass.bus.async_listen_once("homeassistant_stop", _async_shutdown)
+        )
     
     _LOGGER.info("EVCC Scheduler integration setup completed successfully")
 
@@ -96,25 +145,14 @@ async def async_setup_entry(hass, entry):
 
 async def async_unload_entry(hass, entry):
     """Beende die Integration und räume auf"""
-    from homeassistant.helpers.entity_registry import async_get
-    
     _LOGGER.info("Unloading EVCC Scheduler integration")
     
-    # Entferne alle Entities dieser Integration aus der Registry
-    # Dies ist wichtig für Reload: Alle Entities werden gelöscht und beim nächsten Start neu angelegt
-    entity_registry = async_get(hass)
-    entities_to_remove = [
-        entity_id
-        for entity_id, entity_entry in entity_registry.entities.items()
-        if entity_entry.config_entry_id == entry.entry_id
-    ]
-    
-    for entity_id in entities_to_remove:
-        entity_registry.async_remove(entity_id)
-        _LOGGER.debug("Removed entity from registry: %s", entity_id)
-    
-    if entities_to_remove:
-        _LOGGER.info("Removed %d entities from registry on unload", len(entities_to_remove))
+    if not entry.data.get(CONF_KEEP_ENTITIES, DEFAULT_KEEP_ENTITIES):
+        # Entferne alle Entities dieser Integration aus der Registry
+        # Beim nächsten Start werden alle Entities neu angelegt
+        removed = _remove_registry_entries(hass, entry)
+        if removed:
+            _LOGGER.info("Removed %d entities from registry on unload", removed)
     
     # Unload all platforms
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -126,6 +164,10 @@ async def async_unload_entry(hass, entry):
     if coordinator.ws:
         await coordinator.ws.disconnect()
         _LOGGER.debug("WebSocket connection closed")
+
+    # Gepufferte Entity-Änderungen noch schreiben, ausstehende WS-Refreshes verwerfen
+    await coordinator.mutation_queue.async_flush_all()
+    await coordinator.refresh_scheduler.async_shutdown()
     
     # Close API client
     await coordinator.api.close()
@@ -1,37 +1,125 @@
 import aiohttp
 import logging
+import time
 from typing import Any, Dict, List
+from . import codec
+from .const import (
+    DEFAULT_HTTP_DNS_CACHE_TTL,
+    DEFAULT_HTTP_KEEPALIVE,
+    DEFAULT_HTTP_POOL_LIMIT,
+    DEFAULT_PROJECTED_STATE,
+    DEFAULT_TIMEOUT,
+    STATE_VEHICLES_JQ,
+)
+from .metrics import EvccMetrics
+from .profiler import EvccProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
+# EVCC komprimiert große Antworten (/api/state) auf Wunsch
+_REQUEST_HEADERS = {"Accept-Encoding": "gzip, deflate"}
+_POST_HEADERS = {**_REQUEST_HEADERS, "Content-Type": "application/json"}
+# Mit diesen Status lehnen ältere EVCC-Versionen den jq-Filter ab; andere
+# (z.B. 502/503 während eines EVCC-Neustarts) sind vorübergehend
+_PROJECTION_UNSUPPORTED_STATUS = frozenset({400, 404, 422})
+
 class EvccApiClient:
-    def __init__(self, host: str, port: int) -> None:
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        projected_state: bool = DEFAULT_PROJECTED_STATE,
+        metrics: EvccMetrics | None = None,
+        profiler: EvccProfiler | None = None,
+        session: aiohttp.ClientSession | None = None,
+        timeout: float = DEFAULT_TIMEOUT,
+        pool_limit: int = DEFAULT_HTTP_POOL_LIMIT,
+        keepalive_timeout: float = DEFAULT_HTTP_KEEPALIVE,
+    ) -> None:
         self.base_url = f"http://{host}:{port}/api"
-        self.session: aiohttp.ClientSession | None = None
+        # Geteilte Session (z.B. von Home Assistant) wird nie von uns geschlossen
+        self.session: aiohttp.ClientSession | None = session
+        self._owns_session = session is None
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._pool_limit = pool_limit
+        self._keepalive_timeout = keepalive_timeout
+        self.metrics = metrics or EvccMetrics()
+        self.profiler = profiler or EvccProfiler()
+        # Wird deaktiviert, sobald EVCC den jq-Filter nicht versteht (ältere Versionen)
+        self._projection_supported = projected_state
         _LOGGER.info("EVCC API Base URL: %s", self.base_url)
 
     async def _get_session(self) -> aiohttp.ClientSession:
-        """Get or create a persistent session."""
-        if self.session is None or self.session.closed:
-            self.session = aiohttp.ClientSession()
+        """Get or create a persistent session with a pooled keep-alive connector."""
+        if self.session is None or (self._owns_session and self.session.closed):
+            connector = aiohttp.TCPConnector(
+                limit=self._pool_limit,
+                limit_per_host=self._pool_limit,
+                keepalive_timeout=self._keepalive_timeout,
+                ttl_dns_cache=DEFAULT_HTTP_DNS_CACHE_TTL,
+            )
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
+            self._owns_session = True
         return self.session
 
+    async def _read_json(self, resp: aiohttp.ClientResponse) -> Any:
+        """Read the response body and decode it (timed as JSON decode span)."""
+        body = await resp.read()
+        with self.profiler.span("json_decode"):
+            return codec.loads(body) if body.strip() else None
+
     async def close(self) -> None:
-        """Close the session."""
-        if self.session and not self.session.closed:
+        """Close the session (only if it is our own)."""
+        if self._owns_session and self.session and not self.session.closed:
             await self.session.close()
 
     async def get_state(self) -> Dict[str, Any]:
         """Get the complete system state from EVCC."""
         session = await self._get_session()
         url = f"{self.base_url}/state"
+        started = time.perf_counter()
         try:
-            async with session.get(url) as resp:
+            async with session.get(url, headers=_REQUEST_HEADERS, timeout=self._timeout) as resp:
                 resp.raise_for_status()
-                return await resp.json()
+                return await self._read_json(resp)
         except aiohttp.ClientResponseError as e:
             _LOGGER.error("API Error fetching state - Status: %d", e.status)
             raise
+        finally:
+            self.metrics.state_duration.observe(time.perf_counter() - started)
+
+    async def get_vehicles_state(self) -> Dict[str, Any]:
+        """Get only the vehicles section of the EVCC state.
+
+        Uses the jq filter of /api/state so EVCC does not serialize loadpoints,
+        tariffs and forecasts. Falls back to the complete state (and stays there)
+        if EVCC rejects the filter (400/404/422) or answers with an unexpected
+        payload; other HTTP errors are raised like in get_state.
+        """
+        if self._projection_supported:
+            session = await self._get_session()
+            url = f"{self.base_url}/state"
+            started = time.perf_counter()
+            try:
+                async with session.get(
+                    url, params={"jq": STATE_VEHICLES_JQ}, headers=_REQUEST_HEADERS, timeout=self._timeout
+                ) as resp:
+                    resp.raise_for_status()
+                    state = await self._read_json(resp)
+                if isinstance(state, dict) and "vehicles" in state:
+                    self.metrics.state_duration.observe(time.perf_counter() - started)
+                    return state
+                _LOGGER.info("EVCC returned unexpected payload for projected state, falling back to full state")
+            except aiohttp.ClientResponseError as e:
+                if e.status not in _PROJECTION_UNSUPPORTED_STATUS:
+                    _LOGGER.error("API Error fetching projected state - Status: %d", e.status)
+                    raise
+                _LOGGER.info("EVCC does not support projected state (Status: %d), falling back to full state", e.status)
+            except ValueError:
+                _LOGGER.info("EVCC returned invalid JSON for projected state, falling back to full state")
+            self._projection_supported = False
+
+        return await self.get_state()
 
     async def get_repeating_plans(self, vehicle_id: str) -> List[Dict[str, Any]]:
         """Get repeating plans for a vehicle.
@@ -39,11 +127,10 @@ class EvccApiClient:
         Note: The repeating plans are retrieved from the /state endpoint
         since there's no direct GET endpoint for repeating plans.
         """
-        session = await self._get_session()
-        state = await self.get_state()
+        state = await self.get_vehicles_state()
         
         # Extract the repeating plans from the state for this vehicle
-        vehicles = state.get("vehicles", {})
+        vehicles = state.get("vehicles") or {}
         if vehicle_id in vehicles:
             vehicle_data = vehicles[vehicle_id]
             plans = vehicle_data.get("repeatingPlans", [])
@@ -67,10 +154,13 @@ class EvccApiClient:
         
         _LOGGER.info("Setting %d repeating plans for vehicle %s", len(plans), vehicle_id)
         
+        started = time.perf_counter()
         try:
-            async with session.post(url, json=plans) as resp:
+            async with session.post(
+                url, data=codec.dumps(plans), headers=_POST_HEADERS, timeout=self._timeout
+            ) as resp:
                 resp.raise_for_status()
-                result = await resp.json()
+                result = await self._read_json(resp)
                 _LOGGER.info("Successfully updated repeating plans for vehicle %s", vehicle_id)
                 return result if result else plans
         except aiohttp.ClientResponseError as e:
@@ -79,3 +169,5 @@ class EvccApiClient:
         except Exception as e:
             _LOGGER.error("Unexpected error setting plans for vehicle %s: %s", vehicle_id, str(e))
             raise
+        finally:
+            self.metrics.post_duration.observe(time.perf_counter() - started)
@@ -1,7 +1,9 @@
 import logging
 from typing import Any
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity, DataUpdateCoordinator
 from .mapping import build_entity_id
+from .models import RepeatingPlan
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -12,7 +14,7 @@ class BaseEvccPlanEntity(CoordinatorEntity):
     _attr_should_poll = False
     _attr_has_entity_name = True
 
-    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: dict, vehicle_title: str) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: RepeatingPlan, vehicle_title: str) -> None:
         super().__init__(coordinator)
         self.vehicle_id = vehicle_id
         self.index = index
@@ -20,14 +22,41 @@ class BaseEvccPlanEntity(CoordinatorEntity):
         self.vehicle_title = vehicle_title
         # Basis-ID ohne Suffix; Plattformen hängen ihr Suffix an
         self._base_id = build_entity_id(vehicle_id, index, vehicle_title)
+        # Zuletzt geschriebene Verfügbarkeit (Coordinator-Fehler ändern sie ohne Plan-Diff)
+        self._written_available = True
 
-    def update_data(self, vehicle_id: str, plan: dict, vehicle_title: str) -> None:
+    def update_data(self, vehicle_id: str, plan: RepeatingPlan, vehicle_title: str) -> None:
         """Aktualisiert gemeinsame Entity-Daten ohne Neuanlage."""
         self.vehicle_id = vehicle_id
         self.plan = plan
         self.vehicle_title = vehicle_title
         # Name bleibt vom jeweiligen Subtyp gesetzt
 
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Plan-Änderungen schreibt allein der EvccPlanSyncHub (apply_diff).
+
+        Hier wird nur geschrieben, wenn sich die Verfügbarkeit geändert hat,
+        statt bei jedem Coordinator-Update alle Entities neu zu schreiben.
+        """
+        available = self.available
+        if available != self._written_available:
+            self._written_available = available
+            self.async_write_ha_state()
+
+    async def _async_queue_plan_edit(self, field: str, value: Any) -> None:
+        """Zeige eine Feld-Änderung (RepeatingPlan-Feld) sofort an und schreibe sie gebündelt zu EVCC."""
+        previous = self.plan
+        self.plan = self.plan.with_fields(**{field: value})
+        self.async_write_ha_state()
+        try:
+            await self.coordinator.mutation_queue.async_set_field(self.vehicle_id, self.index, field, value)
+        except Exception:
+            # Optimistische Anzeige zurücknehmen; der Sync überspringt unveränderte Pläne
+            self.plan = previous
+            self.async_write_ha_state()
+            raise
+
     def make_unique_id(self, suffix: str) -> str:
         """Erzeuge eindeutige ID basierend auf Basis-ID und Suffix."""
         if not suffix:
@@ -0,0 +1,36 @@
+"""JSON-Codec für WS-Frames und State-Payloads.
+
+Nutzt orjson, wenn installiert (in Home Assistant ohnehin vorhanden), und fällt
+sonst auf die Standardbibliothek zurück. orjson.JSONDecodeError ist eine
+Unterklasse von json.JSONDecodeError, Fehlerbehandlung bleibt also gleich.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - abhängig von der Umgebung
+    orjson = None
+
+
+if orjson is not None:
+    BACKEND = "orjson"
+
+    def loads(data: str | bytes) -> Any:
+        """Dekodiere JSON aus str oder bytes."""
+        return orjson.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """Serialisiere nach JSON (kompakt, als str)."""
+        return orjson.dumps(obj).decode("utf-8")
+
+else:
+    BACKEND = "json"
+
+    def loads(data: str | bytes) -> Any:
+        """Dekodiere JSON aus str oder bytes."""
+        return json.loads(data)
+
+    def dumps(obj: Any) -> str:
+        """Serialisiere nach JSON (kompakt, als str)."""
+        return json.dumps(obj, separators=(",", ":"))
@@ -12,8 +12,14 @@ from .const import (
     CONF_WEBSOCKET,
     CONF_WS_API,
     CONF_POLL_INTERVAL,
+    CONF_PROJECTED_STATE,
+    CONF_KEEP_ENTITIES,
+    CONF_SHARED_SESSION,
     DEFAULT_WEBSOCKET,
     DEFAULT_POLL_INTERVAL,
+    DEFAULT_PROJECTED_STATE,
+    DEFAULT_KEEP_ENTITIES,
+    DEFAULT_SHARED_SESSION,
 )
 
 class EvccSchedulerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
@@ -36,6 +42,9 @@ class EvccSchedulerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Optional(CONF_SSL, default=False): bool,
             vol.Optional(CONF_WEBSOCKET, default=DEFAULT_WEBSOCKET): bool,
             vol.Optional(CONF_POLL_INTERVAL, default=DEFAULT_POLL_INTERVAL): int,
+            vol.Optional(CONF_PROJECTED_STATE, default=DEFAULT_PROJECTED_STATE): bool,
+            vol.Optional(CONF_KEEP_ENTITIES, default=DEFAULT_KEEP_ENTITIES): bool,
+            vol.Optional(CONF_SHARED_SESSION, default=DEFAULT_SHARED_SESSION): bool,
             vol.Optional(CONF_WS_API, default=False): bool,
         })
 
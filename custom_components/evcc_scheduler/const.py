@@ -8,6 +8,9 @@ CONF_SSL = "ssl"
 CONF_WEBSOCKET = "websocket"
 CONF_WS_API = "websocket_api"
 CONF_POLL_INTERVAL = "poll_interval"
+CONF_PROJECTED_STATE = "projected_state"
+CONF_KEEP_ENTITIES = "keep_entities"
+CONF_SHARED_SESSION = "shared_session"
 
 DEFAULT_PORT = 7070
 DEFAULT_SSL = False
@@ -15,5 +18,41 @@ DEFAULT_TIMEOUT = 10
 DEFAULT_WEBSOCKET = True
 DEFAULT_WS_API = False
 DEFAULT_POLL_INTERVAL = 30
+DEFAULT_PROJECTED_STATE = True
+DEFAULT_KEEP_ENTITIES = True
+DEFAULT_SHARED_SESSION = False
 
-PLATFORMS = ["switch", "time", "text", "number"]
\ No newline at end of file
+# Entprellung WS-getriggerter Refreshes (Sekunden)
+DEFAULT_REFRESH_QUIET_WINDOW = 0.5
+DEFAULT_REFRESH_MAX_LATENCY = 3.0
+
+# Wartezeit, bevor gesammelte Entity-Änderungen zu EVCC geschrieben werden (Sekunden)
+DEFAULT_WRITE_SETTLE_TIME = 0.5
+# Spätestens so lange nach der ersten gesammelten Änderung wird trotzdem geschrieben
+DEFAULT_WRITE_MAX_LATENCY = 3.0
+
+# HTTP-Verbindungspool zu EVCC (gilt nur für die eigene Session)
+DEFAULT_HTTP_POOL_LIMIT = 4
+DEFAULT_HTTP_KEEPALIVE = 60
+DEFAULT_HTTP_DNS_CACHE_TTL = 300
+
+# Maximal gleichzeitige POSTs des Services bulk_set_plans
+DEFAULT_BULK_CONCURRENCY = 4
+
+# Ausgehende Nachrichten pro Custom-Card-Client, bevor er als zu langsam getrennt wird
+DEFAULT_WS_CLIENT_QUEUE = 32
+
+# jq-Filter für /api/state: nur den Fahrzeug-Teil übertragen
+STATE_VEHICLES_JQ = "{vehicles: .vehicles}"
+
+# Adaptives Polling: Sicherheitsintervall, solange der EVCC-WebSocket liefert (Sekunden)
+DEFAULT_SAFETY_POLL_INTERVAL = 300
+# Ohne WS-Frame seit so vielen Sekunden gilt die Verbindung als stumm → wieder normal pollen
+DEFAULT_WS_SILENCE_TIMEOUT = 120
+# Wie oft der Watchdog den WebSocket prüft (unabhängig vom Polling-Intervall)
+DEFAULT_WS_WATCHDOG_INTERVAL = 30
+
+POLL_MODE_PUSH = "push"
+POLL_MODE_POLLING = "polling"
+
+PLATFORMS = ["switch", "time", "text", "number", "sensor"]
\ No newline at end of file
@@ -1,15 +1,36 @@
 import logging
+import time
 from datetime import timedelta
-from typing import Any, Dict
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+from typing import Any, Callable, Dict, List
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 from .api import EvccApiClient
 from .mapping import extract_plans
-from .const import DEFAULT_POLL_INTERVAL
+from .delta import apply_delta, extract_plan_list, set_vehicle_plans
+from .models import RepeatingPlan, plans_from_evcc, plans_to_evcc
+from .refresh_scheduler import EvccRefreshScheduler
+from .mutation_queue import EvccPlanMutationQueue
+from .entity_manager import EvccPlanSyncHub
+from .const import (
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_SAFETY_POLL_INTERVAL,
+    DEFAULT_WS_SILENCE_TIMEOUT,
+    DEFAULT_WS_WATCHDOG_INTERVAL,
+    POLL_MODE_POLLING,
+    POLL_MODE_PUSH,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
 class EvccCoordinator(DataUpdateCoordinator):
-    def __init__(self, hass: Any, api: EvccApiClient, poll_interval: int = DEFAULT_POLL_INTERVAL) -> None:
+    def __init__(
+        self,
+        hass: Any,
+        api: EvccApiClient,
+        poll_interval: int = DEFAULT_POLL_INTERVAL,
+        safety_interval: int = DEFAULT_SAFETY_POLL_INTERVAL,
+    ) -> None:
         super().__init__(
             hass,
             _LOGGER,
@@ -17,27 +38,219 @@ class EvccCoordinator(DataUpdateCoordinator):
             update_interval=timedelta(seconds=poll_interval),
         )
         self.api = api
+        # Adaptives Polling: eng ohne WebSocket, nur Sicherheitsintervall solange er liefert
+        self.poll_interval = timedelta(seconds=poll_interval)
+        self.safety_interval = timedelta(seconds=max(safety_interval, poll_interval))
+        self.poll_mode = POLL_MODE_POLLING
+        self.poll_mode_changes = 0
+        # EVCC-WebSocket-Client (wird beim Setup gesetzt, None = nur Polling)
+        self.ws = None
+        # Metriken teilen sich API-Client, Coordinator, WS-Client und Entity-Sync
+        self.metrics = api.metrics
+        # Opt-in-Profiling (evcc_scheduler.start_profile), ebenfalls geteilt
+        self.profiler = api.profiler
         self.id_map: Dict[str, str] = {}
-    
-    
+        # Zeitpunkt (monotonic), zu dem die gecachten Daten zuletzt bestätigt wurden
+        self.data_updated_at: float | None = None
+        # Bündelt WS-getriggerte Refreshes zu einem einzigen Fetch
+        self.refresh_scheduler = EvccRefreshScheduler(self.async_refresh)
+        # Alle Plan-Änderungen laufen pro Fahrzeug seriell und gebündelt hierüber
+        self.mutation_queue = EvccPlanMutationQueue(self)
+        # Gemeinsamer Plan-Diff für alle Plattformen
+        self.plan_sync = EvccPlanSyncHub(self)
+
+    def async_apply_ws_message(self, message: Dict[str, Any]) -> bool:
+        """Wende eine WS-Nachricht als Delta auf die gecachten Daten an.
+
+        Gibt False zurück, wenn ein vollständiger Refresh nötig ist.
+        """
+        if self.data is None:
+            return False
+        if not apply_delta(self.data, message):
+            return False
+        self.id_map = self.data.get("id_map", self.id_map)
+        self.data_updated_at = time.monotonic()
+        self.async_set_updated_data(self.data)
+        return True
+
+    async def async_handle_ws_message(self, message: Dict[str, Any]) -> None:
+        """Callback für den WS-Client: Delta anwenden oder Refresh einplanen."""
+        # Delta direkt auf gecachte Daten anwenden; nur wenn das nicht geht, /api/state neu laden
+        if self.async_apply_ws_message(message):
+            _LOGGER.debug("WebSocket delta applied to coordinator data")
+            return
+        _LOGGER.debug("WebSocket update not applicable as delta, scheduling coordinator refresh")
+        self.refresh_scheduler.trigger()
+
+    async def async_handle_ws_reconnect(self) -> None:
+        """Callback für den WS-Client nach einem Reconnect."""
+        # Während der Verbindungspause können Deltas verloren gegangen sein
+        _LOGGER.debug("WebSocket reconnected, scheduling coordinator refresh")
+        self.refresh_scheduler.trigger()
+
+    def async_handle_ws_status(self, connected: bool) -> None:
+        """Callback für den WS-Client bei Verbindungsauf- und -abbau."""
+        _LOGGER.debug("WebSocket %s", "connected" if connected else "disconnected")
+        self.async_update_poll_mode()
+
+    def async_start_ws_watchdog(self) -> Callable[[], None]:
+        """Prüfe den WebSocket in festen Abständen; gibt die Abmeldefunktion zurück.
+
+        Ohne Watchdog würde ein stummer WebSocket erst beim nächsten Poll
+        (im Push-Modus bis zu `safety_interval`) bemerkt.
+        """
+        return async_track_time_interval(
+            self.hass, self._async_ws_watchdog, timedelta(seconds=DEFAULT_WS_WATCHDOG_INTERVAL)
+        )
+
+    @callback
+    def _async_ws_watchdog(self, _now: Any) -> None:
+        self.async_update_poll_mode()
+
+    def async_update_poll_mode(self, refresh: bool = True) -> str:
+        """Passe das Polling-Intervall an den Zustand des WebSockets an.
+
+        Liefert der WebSocket, reicht ein langes Sicherheitsintervall; fällt er
+        aus (Backoff) oder bleibt stumm, wird wieder mit `poll_interval` gepollt.
+        Beim Wechsel auf Polling wird sofort nachgeladen (`refresh`), weil
+        Deltas verloren gegangen sein können.
+        """
+        ws = self.ws
+        delivering = ws is not None and ws.delivering(DEFAULT_WS_SILENCE_TIMEOUT)
+        mode = POLL_MODE_PUSH if delivering else POLL_MODE_POLLING
+        if mode == self.poll_mode:
+            return mode
+
+        self.poll_mode = mode
+        self.poll_mode_changes += 1
+        self.update_interval = self.safety_interval if mode == POLL_MODE_PUSH else self.poll_interval
+        _LOGGER.info(
+            "Poll mode changed to %s (interval: %ds)", mode, self.update_interval.total_seconds()
+        )
+        if mode == POLL_MODE_POLLING and refresh and self.data is not None:
+            # Neu geplanter Refresh nutzt danach schon das kurze Intervall
+            self.refresh_scheduler.trigger()
+        return mode
+
+    def async_set_vehicle_plans(self, vehicle_id: str, plans: tuple) -> bool:
+        """Übernimm bestätigte Pläne eines Fahrzeugs ohne erneuten Fetch."""
+        if self.data is None or not set_vehicle_plans(self.data, vehicle_id, plans):
+            return False
+        if self.ws is not None:
+            # EVCC echot den POST nicht immer; ein späterer Frame mit dem alten Wert ist kein Duplikat
+            self.ws.invalidate_dedup(vehicle_id)
+        self.async_set_updated_data(self.data)
+        return True
+
+    def cache_is_fresh(self) -> bool:
+        """Sind die gecachten Pläne aktuell genug für lesende Zugriffe?
+
+        Liefert der WebSocket (Modus "push"), hält der Delta-Pfad den Cache
+        aktuell; sonst gilt er bis zum nächsten regulären Poll als frisch. Ein
+        ausstehender (WS-getriggerter) Refresh bedeutet immer: veraltet.
+        Schreibzugriffe verlangen mehr, siehe `async_write_plans`.
+        """
+        if self.data is None or not self.last_update_success or self.data_updated_at is None:
+            return False
+        if self.refresh_scheduler.pending:
+            return False
+        if self.poll_mode == POLL_MODE_PUSH:
+            return True
+        return time.monotonic() - self.data_updated_at < self.update_interval.total_seconds()
+
+    async def async_get_vehicles(self, vehicle_id: str | None = None, force: bool = False) -> Dict[str, Any]:
+        """Fahrzeuge aus dem Cache; Refresh nur, wenn er veraltet ist oder `vehicle_id` fehlt."""
+        vehicles = (self.data or {}).get("vehicles") or {}
+        if not force and self.cache_is_fresh() and (vehicle_id is None or vehicle_id in vehicles):
+            return vehicles
+        await self.async_refresh()
+        if not self.last_update_success:
+            raise UpdateFailed("EVCC state could not be fetched")
+        return (self.data or {}).get("vehicles") or {}
+
+    async def async_get_vehicles_for_write(self) -> Dict[str, Any]:
+        """Fahrzeuge als Basis für Schreibvorgänge (frisch geladen, außer im Modus "push")."""
+        return await self.async_get_vehicles(force=self.poll_mode != POLL_MODE_PUSH)
+
+    async def async_write_plans(
+        self,
+        vehicle_id: str,
+        mutate: Callable[[List[RepeatingPlan]], List[RepeatingPlan] | None],
+        fetch: bool = True,
+    ) -> tuple:
+        """Read-Modify-Write der Pläne eines Fahrzeugs.
+
+        `mutate` bekommt eine Liste der gecachten (unveränderlichen) Pläne und
+        liefert die neue Liste (oder ersetzt Einträge in-place und gibt None
+        zurück). Gibt die von EVCC bestätigten Pläne zurück.
+
+        EVCC kennt keine Revisionen und lehnt veraltete Schreibvorgänge nicht
+        ab. Der Cache wird daher nur genutzt, solange der WebSocket liefert
+        (Modus "push"); sonst wird vorher frisch geladen, damit Änderungen aus
+        der EVCC-Oberfläche seit dem letzten Poll nicht überschrieben werden.
+        Mit `fetch=False` entfällt dieser Fetch, weil der Aufrufer den Stand
+        schon über `async_get_vehicles_for_write` geladen hat (z.B. bulk_set_plans).
+
+        Nicht direkt aufrufen, sondern über `mutation_queue` (serialisiert pro Fahrzeug).
+        """
+        if fetch:
+            vehicles = await self.async_get_vehicles_for_write()
+        else:
+            vehicles = await self.async_get_vehicles(vehicle_id)
+        if vehicle_id not in vehicles:
+            raise ValueError(f"Vehicle {vehicle_id} not found")
+
+        # Revision = Fahrzeug-Dict selbst (Copy-on-Write, jede Änderung ersetzt es)
+        revision = vehicles[vehicle_id]
+        plans = list(revision.get("repeatingPlans", ()))
+        result = mutate(plans)
+        if result is not None:
+            plans = result
+
+        payload = plans_to_evcc(plans)
+        response = await self.api.set_repeating_plans(vehicle_id, payload)
+        # set_repeating_plans gibt bei leerer Antwort die gesendete Liste zurück
+        confirmed = extract_plan_list(response) if response is not payload else None
+        written = plans_from_evcc(confirmed) if confirmed is not None else tuple(plans)
+
+        current = ((self.data or {}).get("vehicles") or {}).get(vehicle_id)
+        if current is not None and current is not revision and current.get("repeatingPlans") != written:
+            # Während des POST kamen andere Pläne an (parallele Änderung) → neu laden
+            _LOGGER.info("Plans of vehicle %s changed concurrently, refreshing", vehicle_id)
+            await self.async_refresh()
+        else:
+            self.async_set_vehicle_plans(vehicle_id, written)
+        return written
+
     async def _async_update_data(self) -> Dict[str, Any]:
+        # Stummen WebSocket erkennen; das Intervall gilt schon für den nächsten Poll
+        self.async_update_poll_mode(refresh=False)
+        with self.profiler.span("update_data"):
+            return await self._async_fetch_vehicles()
+
+    async def _async_fetch_vehicles(self) -> Dict[str, Any]:
         _LOGGER.debug("Fetching EVCC state and plans")
-        state = await self.api.get_state()
+        self.metrics.refresh_count += 1
+        try:
+            state = await self.api.get_vehicles_state()
+        except Exception:
+            self.metrics.refresh_failures += 1
+            raise
         
         # Lade Pläne für ALLE Fahrzeuge
         vehicles_data = {}
-        all_vehicles = state.get("vehicles", {})
+        all_vehicles = state.get("vehicles") or {}
         
         for vehicle_id, vehicle_data in all_vehicles.items():
             if not isinstance(vehicle_data, dict):
                 continue
                 
             title = vehicle_data.get("title", vehicle_id)
-            plans = vehicle_data.get("repeatingPlans", [])
+            plans = plans_from_evcc(vehicle_data.get("repeatingPlans"))
             
             vehicles_data[vehicle_id] = {
                 "title": title,
-                "repeatingPlans": plans if isinstance(plans, list) else []
+                "repeatingPlans": plans
             }
             
             self.id_map[vehicle_id] = title
@@ -46,5 +259,9 @@ class EvccCoordinator(DataUpdateCoordinator):
         if not vehicles_data:
             _LOGGER.info("No vehicles found in EVCC")
             self.id_map = {}
-        
+
+        if self.ws is not None:
+            # Der Cache entspricht jetzt /api/state, nicht mehr den gemerkten WS-Frames
+            self.ws.invalidate_dedup()
+        self.data_updated_at = time.monotonic()
         return {"vehicles": vehicles_data, "id_map": self.id_map}
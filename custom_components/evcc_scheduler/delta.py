@@ -0,0 +1,77 @@
+"""Inkrementelles Anwenden von EVCC-WebSocket-Deltas auf die Coordinator-Daten."""
+import logging
+import re
+from typing import Any, Dict
+
+from .mapping import extract_plans
+from .models import plans_from_evcc
+
+_LOGGER = logging.getLogger(__name__)
+
+_PLAN_PATH = re.compile(r"^/api/vehicles/([^/]+)/plan/repeating/?$")
+_TITLE_PATH = re.compile(r"^/api/vehicles/([^/]+)/title/?$")
+
+
+def extract_plan_list(result: Any) -> list | None:
+    """Hole die Planliste aus einer POST-Antwort von EVCC (ggf. in 'result' verpackt)."""
+    if isinstance(result, dict):
+        result = result.get("result")
+    return result if isinstance(result, list) else None
+
+
+def set_vehicle_plans(data: Dict[str, Any], vehicle_id: str, plans: tuple) -> bool:
+    """Ersetze die Pläne (Tupel von RepeatingPlan) eines bekannten Fahrzeugs in-place."""
+    vehicles = data.get("vehicles") if isinstance(data, dict) else None
+    if not isinstance(vehicles, dict) or vehicle_id not in vehicles or not isinstance(plans, tuple):
+        return False
+    # Fahrzeug-Dict ersetzen statt mutieren, damit Entities alte Referenzen behalten
+    vehicles[vehicle_id] = {**vehicles[vehicle_id], "repeatingPlans": plans}
+    return True
+
+
+def apply_delta(data: Dict[str, Any], message: Dict[str, Any]) -> bool:
+    """Patche die Coordinator-Daten in-place mit einer WS-Nachricht.
+
+    Gibt False zurück, wenn die Nachricht nicht als Delta anwendbar ist
+    (unbekanntes Fahrzeug, unerwarteter Wert, unbekannter Pfad). Der Aufrufer
+    muss dann einen vollständigen Refresh von /api/state auslösen.
+    """
+    if not isinstance(data, dict) or not isinstance(message, dict):
+        return False
+
+    vehicles = data.get("vehicles")
+    if not isinstance(vehicles, dict):
+        return False
+
+    # Vollständiger State: Fahrzeugteil direkt übernehmen
+    if "vehicles" in message and "loadpoints" in message:
+        extracted = extract_plans(message)
+        data["vehicles"] = extracted["vehicles"]
+        data["id_map"] = extracted["id_map"]
+        _LOGGER.debug("Applied full state from WS (%d vehicles)", len(extracted["vehicles"]))
+        return True
+
+    path = message.get("path", "")
+    if not path or "value" not in message:
+        return False
+    value = message["value"]
+
+    match = _PLAN_PATH.match(path)
+    if match:
+        vehicle_id = match.group(1)
+        if not isinstance(value, list) or not set_vehicle_plans(data, vehicle_id, plans_from_evcc(value)):
+            return False
+        _LOGGER.debug("Applied plan delta for vehicle %s (%d plans)", vehicle_id, len(value))
+        return True
+
+    match = _TITLE_PATH.match(path)
+    if match:
+        vehicle_id = match.group(1)
+        if vehicle_id not in vehicles or not isinstance(value, str):
+            return False
+        vehicles[vehicle_id] = {**vehicles[vehicle_id], "title": value}
+        data.setdefault("id_map", {})[vehicle_id] = value
+        _LOGGER.debug("Applied title delta for vehicle %s", vehicle_id)
+        return True
+
+    return False
@@ -1,72 +1,280 @@
 import logging
-from typing import Any, Callable, Dict
+import time
+from typing import Any, Callable, Dict, List, NamedTuple
 from homeassistant.helpers.entity_registry import async_get
 from .mapping import build_entity_id
+from .metrics import EvccMetrics
+from .models import RepeatingPlan
 
 _LOGGER = logging.getLogger(__name__)
 
 
+class PlanRef(NamedTuple):
+    """Verweis auf einen Plan eines Fahrzeugs, wie ihn die Plattformen benötigen."""
+
+    base_id: str
+    vehicle_id: str
+    index: int
+    plan: RepeatingPlan
+    title: str
+
+
+class PlanDiff:
+    """Änderungen zwischen zwei Coordinator-Ständen (hinzugefügt/geändert/entfernt)."""
+
+    __slots__ = ("added", "changed", "removed", "previous", "vehicles")
+
+    def __init__(self) -> None:
+        self.added: List[PlanRef] = []
+        self.changed: List[PlanRef] = []
+        self.removed: List[PlanRef] = []
+        # base_id -> Plan vor der Änderung (nur für `changed`)
+        self.previous: Dict[str, RepeatingPlan] = {}
+        # Fahrzeuge, deren Pläne oder Titel sich geändert haben
+        self.vehicles: set[str] = set()
+
+    def __bool__(self) -> bool:
+        return bool(self.vehicles or self.added or self.changed or self.removed)
+
+
+class _VehicleState(NamedTuple):
+    source: Dict[str, Any]
+    plans: Dict[str, PlanRef]  # base_id -> PlanRef
+
+
+class EvccPlanSyncHub:
+    """Berechnet pro Coordinator-Update genau einen Plan-Diff und verteilt ihn.
+
+    Alle Plattformen (switch/time/text/number) teilen sich diesen Hub, statt
+    jeweils selbst alle Fahrzeuge und Pläne zu durchlaufen. Fahrzeug-Dicts werden
+    vom Coordinator copy-on-write ersetzt; ein identisches Objekt bedeutet daher
+    "unverändert" und wird ohne Plan-Vergleich übersprungen. Pläne sind
+    unveränderliche RepeatingPlan-Objekte und werden direkt verglichen.
+    """
+
+    def __init__(self, coordinator: Any) -> None:
+        self.coordinator = coordinator
+        self._state: Dict[str, _VehicleState] = {}
+        self._managers: List[tuple] = []
+        self._diff_listeners: List[Callable[[PlanDiff], None]] = []
+        self._unsub_coordinator: Callable | None = None
+
+    def _ensure_listening(self) -> None:
+        if self._unsub_coordinator is None:
+            self._unsub_coordinator = self.coordinator.async_add_listener(self._handle_update)
+            self._compute_diff(self.coordinator.data)
+
+    def _maybe_stop_listening(self) -> None:
+        if not self._managers and not self._diff_listeners and self._unsub_coordinator:
+            self._unsub_coordinator()
+            self._unsub_coordinator = None
+            self._state.clear()
+
+    def async_register(self, manager: "EvccEntityManager", entity_factory: Callable) -> Callable:
+        """Registriere einen Plattform-Manager; er erhält sofort den aktuellen Stand."""
+        registration = (manager, entity_factory)
+
+        self._ensure_listening()
+        manager.apply_diff(self._snapshot(), entity_factory)
+        self._managers.append(registration)
+
+        def _unregister() -> None:
+            if registration in self._managers:
+                self._managers.remove(registration)
+            self._maybe_stop_listening()
+
+        return _unregister
+
+    def async_add_diff_listener(self, listener: Callable[[PlanDiff], None]) -> Callable:
+        """Rufe `listener` mit jedem nicht-leeren Plan-Diff auf (z.B. WS-Abos der Karte).
+
+        Den Ausgangsstand liest der Aufrufer selbst aus `coordinator.data`; der
+        erste Diff danach bezieht sich genau auf diesen Stand.
+        """
+        self._ensure_listening()
+        self._diff_listeners.append(listener)
+
+        def _remove() -> None:
+            if listener in self._diff_listeners:
+                self._diff_listeners.remove(listener)
+            self._maybe_stop_listening()
+
+        return _remove
+
+    def unique_ids(self) -> set[str]:
+        """unique_ids aller Entities der registrierten Plattformen."""
+        return {unique_id for manager, _ in self._managers for unique_id in manager.entities}
+
+    def _handle_update(self) -> None:
+        with self.coordinator.profiler.span("plan_diff"):
+            diff = self._compute_diff(self.coordinator.data)
+        if not diff:
+            _LOGGER.debug("Coordinator update without plan changes")
+            return
+        _LOGGER.debug(
+            "Plan diff: %d added, %d changed, %d removed (%d vehicles)",
+            len(diff.added), len(diff.changed), len(diff.removed), len(diff.vehicles),
+        )
+        profiler = self.coordinator.profiler
+        for manager, entity_factory in list(self._managers):
+            with profiler.span(f"entity_sync.{manager.suffix or 'switch'}"):
+                manager.apply_diff(diff, entity_factory)
+        for listener in list(self._diff_listeners):
+            try:
+                listener(diff)
+            except Exception as err:
+                _LOGGER.error("Plan diff listener failed: %s", err)
+
+    def _snapshot(self) -> PlanDiff:
+        """Aktueller Stand als Diff, in dem alle Pläne 'hinzugefügt' sind."""
+        diff = PlanDiff()
+        for vehicle_id, state in self._state.items():
+            diff.added.extend(state.plans.values())
+            diff.vehicles.add(vehicle_id)
+        return diff
+
+    def _compute_diff(self, data: Dict[str, Any] | None) -> PlanDiff:
+        diff = PlanDiff()
+        vehicles = (data or {}).get("vehicles", {})
+
+        for vehicle_id, vehicle_data in vehicles.items():
+            previous = self._state.get(vehicle_id)
+            if previous is not None and previous.source is vehicle_data:
+                continue
+
+            title = vehicle_data.get("title", vehicle_id)
+            old_plans = previous.plans if previous else {}
+            if previous is None or previous.source.get("title", vehicle_id) != title:
+                # Neues Fahrzeug oder neuer Titel (auch ohne Pläne relevant für Ansichten)
+                diff.vehicles.add(vehicle_id)
+            new_plans: Dict[str, PlanRef] = {}
+
+            for idx, plan in enumerate(vehicle_data.get("repeatingPlans", ()), start=1):
+                base_id = build_entity_id(vehicle_id, idx, title)
+                ref = PlanRef(base_id, vehicle_id, idx, plan, title)
+                new_plans[base_id] = ref
+
+                old = old_plans.get(base_id)
+                if old is None:
+                    diff.added.append(ref)
+                    diff.vehicles.add(vehicle_id)
+                elif old.plan is not plan and old.plan != plan:
+                    diff.changed.append(ref)
+                    diff.previous[base_id] = old.plan
+                    diff.vehicles.add(vehicle_id)
+
+            for base_id, ref in old_plans.items():
+                if base_id not in new_plans:
+                    diff.removed.append(ref)
+                    diff.vehicles.add(vehicle_id)
+
+            self._state[vehicle_id] = _VehicleState(vehicle_data, new_plans)
+
+        for vehicle_id in [vid for vid in self._state if vid not in vehicles]:
+            diff.removed.extend(self._state.pop(vehicle_id).plans.values())
+            diff.vehicles.add(vehicle_id)
+
+        return diff
+
+
 class EvccEntityManager:
     """Verwaltet dynamisches Anlegen, Aktualisieren und Löschen von Plan-Entities"""
 
-    def __init__(self, hass: Any, async_add_entities: Callable, suffix: str = "") -> None:
+    def __init__(self, hass: Any, async_add_entities: Callable, suffix: str = "", metrics: EvccMetrics | None = None) -> None:
         self.hass = hass
+        self.metrics = metrics
         self.async_add_entities = async_add_entities
         self.suffix = suffix
         self.entities: Dict[str, Any] = {}
+        # Statistik: geschriebene/übersprungene State-Writes
+        self.last_sync_stats: Dict[str, int] = {"written": 0, "skipped": 0}
+        self.total_written = 0
+        self.total_skipped = 0
+        self.last_sync_duration = 0.0
         # Registry einmalig initialisieren (statt Lazy-Load bei jedem Sync)
         try:
             self.registry = async_get(self.hass)
         except Exception:
             self.registry = None
 
-    async def sync(self, data: Dict[str, Any], entity_factory: Callable) -> None:
+    def _unique_id(self, ref: PlanRef) -> str:
+        # Suffix wird direkt angehängt an base_id
+        return f"{ref.base_id}{self.suffix}" if self.suffix else ref.base_id
 
-        vehicles = data.get("vehicles", {})
-        _LOGGER.debug("Entity sync (%s): found %d vehicles", self.suffix or "switch", len(vehicles))
-        wanted_ids = set()
+    def apply_diff(self, diff: PlanDiff, entity_factory: Callable) -> None:
+        """Wende einen Plan-Diff des Hubs auf die Entities dieser Plattform an."""
+        started = time.perf_counter()
+        written = 0
+        new_entities = []
 
-        for vehicle_id, vehicle_data in vehicles.items():
-            title = vehicle_data.get("title", vehicle_id)
-            plans = vehicle_data.get("repeatingPlans", [])
+        for ref in diff.added:
+            unique_id = self._unique_id(ref)
+            if unique_id in self.entities:
+                # Bereits vorhanden (z.B. Titelkollision) → wie Änderung behandeln
+                entity = self.entities[unique_id]
+                entity.plan = ref.plan
+                entity.async_write_ha_state()
+                written += 1
+                continue
+            # Neue Entity erzeugen; hinzugefügt wird gesammelt nach der Schleife
+            try:
+                entity = entity_factory(ref.vehicle_id, ref.index, ref.plan, ref.title)
+                self.entities[unique_id] = entity
+                new_entities.append(entity)
+                _LOGGER.debug("Created entity: %s", unique_id)
+            except Exception as e:
+                _LOGGER.error("Failed to create entity %s: %s", unique_id, e)
 
-            for idx, plan in enumerate(plans, start=1):
-                base_id = build_entity_id(vehicle_id, idx, title)
-                # Suffix wird direkt angehängt an base_id
-                unique_id = f"{base_id}{self.suffix}" if self.suffix else base_id
-                wanted_ids.add(unique_id)
-
-                if unique_id not in self.entities:
-                    # Neue Entity erzeugen
-                    try:
-                        entity = entity_factory(vehicle_id, idx, plan, title)
-                        self.entities[unique_id] = entity
-                        self.async_add_entities([entity])
-                        _LOGGER.debug("Created entity: %s", unique_id)
-                    except Exception as e:
-                        _LOGGER.error("Failed to create entity %s: %s", unique_id, e)
-                else:
-                    # Bestehende Entity aktualisieren
-                    entity = self.entities[unique_id]
-                    entity.plan = plan
-                    entity.async_write_ha_state()
-
-        # Entfernte Entities löschen + Registry bereinigen
-        removed_entities = []
-        for unique_id in list(self.entities.keys()):
-            if unique_id not in wanted_ids:
-                entity = self.entities.pop(unique_id)
-                removed_entities.append(entity)
-                _LOGGER.debug("Removing entity: %s", unique_id)
-
-        # Bereinige Registry async (nach dem Pop)
-        for entity in removed_entities:
-            if hasattr(entity, 'entity_id') and entity.entity_id:
-                try:
-                    await self.registry.async_remove(entity.entity_id)
-                    _LOGGER.debug("Removed entity_id from registry: %s", entity.entity_id)        
-                except Exception as e:
-                    _LOGGER.debug("Could not remove entity %s from registry: %s", entity.entity_id, e)
+        if new_entities:
+            # Ein Aufruf pro Sync statt einem pro Plan
+            self.async_add_entities(new_entities)
+
+        for ref in diff.changed:
+            entity = self.entities.get(self._unique_id(ref))
+            if entity is None:
+                continue
+            entity.plan = ref.plan
+            entity.async_write_ha_state()
+            written += 1
+
+        # Entfernte Entities sammeln und die Registry in einem Durchlauf bereinigen
+        removed_entity_ids = []
+        for ref in diff.removed:
+            entity = self.entities.pop(self._unique_id(ref), None)
+            if entity is not None and getattr(entity, "entity_id", None):
+                removed_entity_ids.append(entity.entity_id)
+        if removed_entity_ids:
+            self._remove_from_registry(removed_entity_ids)
+
+        skipped = max(len(self.entities) - written - len(new_entities), 0)
+        self.last_sync_stats = {
+            "written": written,
+            "skipped": skipped,
+            "added": len(new_entities),
+            "removed": len(removed_entity_ids),
+        }
+        self.total_written += written
+        self.total_skipped += skipped
+        self.last_sync_duration = time.perf_counter() - started
+        if self.metrics is not None:
+            self.metrics.record_sync(written, skipped, self.last_sync_duration)
+        _LOGGER.debug(
+            "Entity sync (%s): %d added, %d removed, %d state writes, %d unchanged skipped in %.2f ms",
+            self.suffix or "switch", len(new_entities), len(removed_entity_ids),
+            written, skipped, self.last_sync_duration * 1000,
+        )
+
+    def _remove_from_registry(self, entity_ids: List[str]) -> None:
+        if not self.registry:
+            return
+        removed = 0
+        for entity_id in entity_ids:
+            try:
+                self.registry.async_remove(entity_id)
+                removed += 1
+            except Exception as e:
+                _LOGGER.debug("Could not remove entity %s from registry: %s", entity_id, e)
+        _LOGGER.debug("Removed %d entities from registry: %s", removed, ", ".join(entity_ids))
 
 
 async def setup_platform(
@@ -80,21 +288,11 @@ async def setup_platform(
 ) -> bool:
     """Gemeinsame Setup-Logik für Plattformen (switch/time/text/number)."""
     coordinator = hass.data["evcc_scheduler"][entry.entry_id]
-    manager = EvccEntityManager(hass, async_add_entities, suffix=suffix)
+    manager = EvccEntityManager(hass, async_add_entities, suffix=suffix, metrics=coordinator.metrics)
     logger.debug("%s platform setup started", platform_name)
 
-    async def async_sync() -> None:
-        await manager.sync(
-            coordinator.data,
-            lambda vehicle_id, idx, plan, title: entity_factory(vehicle_id, idx, plan, title),
-        )
-
-    def handle_update() -> None:
-        logger.debug("Coordinator update received, syncing %s entities", platform_name)
-        hass.async_create_task(async_sync())
-
-    coordinator.async_add_listener(handle_update)
-    await async_sync()
+    # Ein gemeinsamer Diff pro Coordinator-Update für alle Plattformen
+    entry.async_on_unload(coordinator.plan_sync.async_register(manager, entity_factory))
 
     logger.info("%s platform setup completed", platform_name)
     return True
@@ -1,5 +1,7 @@
 from typing import Dict, List, Optional
 
+from .models import plans_from_evcc
+
 def extract_plans(state: Dict) -> Dict:
     vehicles: Dict[str, dict] = {}
     id_to_title: Dict[str, str] = {}
@@ -13,14 +15,10 @@ def extract_plans(state: Dict) -> Dict:
             continue
 
         title = vehicle_data.get("title", vehicle_id)
-        plans = vehicle_data.get("repeatingPlans", [])
-        if not isinstance(plans, list):
-            plans = []
-
-        # Struktur: {vehicle_id: {"title": "...", "repeatingPlans": [...]}}
+        # Struktur: {vehicle_id: {"title": "...", "repeatingPlans": (RepeatingPlan, ...)}}
         vehicles[vehicle_id] = {
             "title": title,
-            "repeatingPlans": plans
+            "repeatingPlans": plans_from_evcc(vehicle_data.get("repeatingPlans"))
         }
         id_to_title[vehicle_id] = title
 
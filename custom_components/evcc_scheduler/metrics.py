@@ -0,0 +1,68 @@
+"""Laufzeit-Metriken der Integration (Zähler und Dauer-Histogramme).
+
+Alle Werte werden in den bestehenden Hot Paths mit einfachen Integer-
+Inkrementen erfasst; Auswertung passiert erst beim Abfragen der Sensoren.
+"""
+import bisect
+from typing import Any, Dict, Tuple
+
+# Obergrenzen der Histogramm-Buckets in Millisekunden (letzter Bucket: darüber)
+DURATION_BUCKETS_MS: Tuple[float, ...] = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class EvccDurationHistogram:
+    """Histogramm für Dauern mit festen Buckets."""
+
+    __slots__ = ("counts", "count", "total", "last")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(DURATION_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.last: float | None = None
+
+    def observe(self, seconds: float) -> None:
+        millis = seconds * 1000
+        self.counts[bisect.bisect_left(DURATION_BUCKETS_MS, millis)] += 1
+        self.count += 1
+        self.total += millis
+        self.last = millis
+
+    @property
+    def average(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def as_dict(self) -> Dict[str, Any]:
+        buckets = {f"le_{int(bound)}ms": count for bound, count in zip(DURATION_BUCKETS_MS, self.counts)}
+        buckets[f"gt_{int(DURATION_BUCKETS_MS[-1])}ms"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "average_ms": round(self.average, 2) if self.count else None,
+            "buckets": buckets,
+        }
+
+
+class EvccMetrics:
+    """Sammelt Metriken von API-Client, Coordinator, WS-Client und Entity-Sync."""
+
+    def __init__(self) -> None:
+        # Coordinator / API
+        self.refresh_count = 0
+        self.refresh_failures = 0
+        self.state_duration = EvccDurationHistogram()
+        self.post_duration = EvccDurationHistogram()
+        # WebSocket
+        self.ws_frames_received = 0
+        self.ws_frames_relevant = 0
+        self.ws_reconnects = 0
+        # Entity-Sync
+        self.sync_count = 0
+        self.entities_written = 0
+        self.entities_skipped = 0
+        self.sync_duration = EvccDurationHistogram()
+
+    def record_sync(self, written: int, skipped: int, seconds: float) -> None:
+        self.sync_count += 1
+        self.entities_written += written
+        self.entities_skipped += skipped
+        self.sync_duration.observe(seconds)
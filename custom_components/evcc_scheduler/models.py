@@ -0,0 +1,184 @@
+"""Kompaktes, unveränderliches Modell eines EVCC-repeatingPlans.
+
+Wochentage werden als 7-Bit-Maske gehalten (Bit i = EVCC-Wochentag i,
+0=Sonntag … 6=Samstag). Nach außen gibt es zwei Schreibweisen:
+
+EVCC: 0=Sonntag, 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag
+User: 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag, 7=Sonntag
+"""
+import sys
+from dataclasses import dataclass, replace
+from datetime import time as dt_time
+from typing import Any, Dict, Iterable, List, Tuple
+
+from . import codec
+
+ALL_WEEKDAYS = 0b1111111
+
+# Reihenfolge der Bits für die User-Schreibweise (Montag zuerst, Sonntag = 7)
+_USER_ORDER = (1, 2, 3, 4, 5, 6, 0)
+
+
+def weekdays_to_mask(days: Iterable[Any], user: bool = False) -> int:
+    """Wandle eine Wochentagsliste (EVCC 0-6 bzw. User 1-7) in eine Bitmaske um."""
+    low, high = (1, 7) if user else (0, 6)
+    mask = 0
+    for day in days:
+        if isinstance(day, bool) or not isinstance(day, int):
+            raise ValueError(f"Ungültiger Wochentag: {day!r}")
+        if not low <= day <= high:
+            raise ValueError(f"Wochentag {day} liegt nicht zwischen {low} und {high}")
+        mask |= 1 << (day % 7)
+    return mask
+
+
+def mask_to_weekdays(mask: int) -> List[int]:
+    """Wochentage in EVCC-Schreibweise (0=Sonntag), aufsteigend."""
+    return [day for day in range(7) if mask >> day & 1]
+
+
+def mask_to_user_weekdays(mask: int) -> List[int]:
+    """Wochentage in User-Schreibweise (1=Montag … 7=Sonntag), aufsteigend."""
+    return [day or 7 for day in _USER_ORDER if mask >> day & 1]
+
+
+def parse_time(value: Any) -> dt_time:
+    """Parse 'HH:MM' (wie von EVCC geliefert) in eine Uhrzeit."""
+    if not isinstance(value, str):
+        raise ValueError(f"Ungültige Uhrzeit: {value!r}")
+    hour, sep, minute = value.partition(":")
+    if not sep or not hour.isdigit() or not minute.isdigit():
+        raise ValueError(f"Uhrzeit '{value}' ist nicht im Format HH:MM")
+    return dt_time(int(hour), int(minute))
+
+
+def format_time(value: dt_time) -> str:
+    return f"{value.hour:02d}:{value.minute:02d}"
+
+
+def _parse_evcc_weekdays(value: Any) -> int:
+    if not isinstance(value, list):
+        raise ValueError("weekdays ist keine Liste")
+    # Unsortiert/doppelt (z.B. [5, 1, 1]) wird normalisiert, nur ungültige Tage nicht
+    return weekdays_to_mask(value)
+
+
+def _parse_evcc_time(value: Any) -> dt_time:
+    parsed = parse_time(value)
+    if format_time(parsed) != value:
+        raise ValueError("time nicht in kanonischer Form")
+    return parsed
+
+
+def _parse_int(value: Any) -> int:
+    if isinstance(value, bool) or not isinstance(value, int):
+        raise ValueError(f"Keine Ganzzahl: {value!r}")
+    return value
+
+
+def _parse_bool(value: Any) -> bool:
+    if not isinstance(value, bool):
+        raise ValueError(f"Kein bool: {value!r}")
+    return value
+
+
+def _parse_str(value: Any) -> str:
+    if not isinstance(value, str):
+        raise ValueError(f"Kein String: {value!r}")
+    return value
+
+
+_EVCC_PARSERS = {
+    "weekdays": _parse_evcc_weekdays,
+    "time": _parse_evcc_time,
+    "tz": _parse_str,
+    "soc": _parse_int,
+    "active": _parse_bool,
+    "precondition": _parse_int,
+}
+
+
+@dataclass(frozen=True, slots=True)
+class RepeatingPlan:
+    """Ein repeatingPlan von EVCC; unveränderlich, hashbar und billig vergleichbar.
+
+    Felder, die EVCC nicht geliefert hat, sind None und werden beim Schreiben
+    weggelassen. Unbekannte Schlüssel und Werte in unerwarteter Form landen als
+    JSON-Text in `extras`, damit `from_evcc(x).to_evcc() == x` gilt. Einzige
+    Ausnahme: Wochentage werden sortiert und ohne Duplikate zurückgeschrieben.
+    """
+
+    weekdays: int | None = None
+    time: dt_time | None = None
+    tz: str | None = None
+    soc: int | None = None
+    active: bool | None = None
+    precondition: int | None = None
+    extras: Tuple[Tuple[str, str], ...] = ()
+
+    def __post_init__(self) -> None:
+        if self.tz is not None:
+            # Alle Pläne teilen sich wenige Zeitzonen-Strings
+            object.__setattr__(self, "tz", sys.intern(self.tz))
+
+    @classmethod
+    def from_evcc(cls, data: Dict[str, Any]) -> "RepeatingPlan":
+        """Erzeuge einen Plan aus dem EVCC-JSON (weekdays 0-6)."""
+        fields: Dict[str, Any] = {}
+        extras = []
+        for key, value in data.items():
+            parser = _EVCC_PARSERS.get(key)
+            if parser is not None:
+                try:
+                    fields[key] = parser(value)
+                    continue
+                except ValueError:
+                    pass
+            extras.append((key, codec.dumps(value)))
+        return cls(**fields, extras=tuple(extras))
+
+    def to_evcc(self) -> Dict[str, Any]:
+        """EVCC-JSON des Plans (weekdays 0-6), z.B. für den POST."""
+        return self._to_dict(mask_to_weekdays)
+
+    def to_user(self) -> Dict[str, Any]:
+        """Wie `to_evcc`, aber mit Wochentagen in User-Schreibweise (1-7)."""
+        return self._to_dict(mask_to_user_weekdays)
+
+    def _to_dict(self, weekdays: Any) -> Dict[str, Any]:
+        data: Dict[str, Any] = {}
+        if self.weekdays is not None:
+            data["weekdays"] = weekdays(self.weekdays)
+        if self.time is not None:
+            data["time"] = format_time(self.time)
+        for key in ("tz", "soc", "active", "precondition"):
+            value = getattr(self, key)
+            if value is not None:
+                data[key] = value
+        for key, raw in self.extras:
+            data[key] = codec.loads(raw)
+        return data
+
+    @property
+    def user_weekdays(self) -> List[int]:
+        return mask_to_user_weekdays(self.weekdays or 0)
+
+    def with_fields(self, **changes: Any) -> "RepeatingPlan":
+        """Neuer Plan mit geänderten Feldern (ersetzt ggf. roh behaltene Werte)."""
+        extras = tuple(item for item in self.extras if item[0] not in changes)
+        return replace(self, extras=extras, **changes)
+
+
+def plans_from_evcc(raw: Any) -> Tuple[RepeatingPlan, ...]:
+    """Wandle eine repeatingPlans-Liste von EVCC um (Nicht-Dicts werden ignoriert)."""
+    if not isinstance(raw, list):
+        return ()
+    return tuple(RepeatingPlan.from_evcc(plan) for plan in raw if isinstance(plan, dict))
+
+
+def plans_to_evcc(plans: Iterable[RepeatingPlan]) -> List[Dict[str, Any]]:
+    return [plan.to_evcc() for plan in plans]
+
+
+def plans_to_user(plans: Iterable[RepeatingPlan]) -> List[Dict[str, Any]]:
+    return [plan.to_user() for plan in plans]
@@ -0,0 +1,152 @@
+"""Serialisierte Plan-Änderungen pro Fahrzeug (Services, Entities, WS-Kommandos)."""
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List
+
+from .const import DEFAULT_WRITE_MAX_LATENCY, DEFAULT_WRITE_SETTLE_TIME
+from .models import RepeatingPlan
+
+_LOGGER = logging.getLogger(__name__)
+
+# Bekommt eine Kopie der Planliste; ändert sie in-place (Rückgabe None) oder liefert eine neue Liste.
+# Die Pläne selbst sind unveränderlich und werden ersetzt (RepeatingPlan.with_fields).
+PlanMutation = Callable[[List[RepeatingPlan]], List[RepeatingPlan] | None]
+
+
+class _QueuedMutation:
+    __slots__ = ("mutate", "future", "fetch", "error")
+
+    def __init__(self, mutate: PlanMutation, future: asyncio.Future, fetch: bool) -> None:
+        self.mutate = mutate
+        self.future = future
+        self.fetch = fetch
+        self.error: Exception | None = None
+
+
+class EvccPlanMutationQueue:
+    """Eine Warteschlange pro Fahrzeug, die Plan-Änderungen nacheinander anwendet.
+
+    Alle Änderungen, die bis zum Flush eingereiht wurden, werden in Reihenfolge
+    auf die zuletzt bekannten Pläne angewendet und mit einem einzigen POST über
+    `coordinator.async_write_plans` geschrieben. Während ein POST läuft, sammeln
+    sich neue Änderungen für den nächsten. Entity-Änderungen (Slider, Toggles)
+    warten zusätzlich `settle_time`, damit schnelle Folgeänderungen mitgehen.
+    Spätestens `max_latency` Sekunden nach der ersten gesammelten Änderung
+    wird trotzdem geschrieben, damit Dauer-Edits den POST nicht beliebig verzögern.
+
+    Wirft eine einzelne Änderung (z.B. ungültiger Index), wird nur sie
+    verworfen und ihr Aufrufer bekommt den Fehler; die übrigen werden geschrieben.
+    """
+
+    def __init__(
+        self,
+        coordinator: Any,
+        settle_time: float = DEFAULT_WRITE_SETTLE_TIME,
+        max_latency: float = DEFAULT_WRITE_MAX_LATENCY,
+    ) -> None:
+        self.coordinator = coordinator
+        self.settle_time = settle_time
+        self.max_latency = max(max_latency, settle_time)
+        self._queues: Dict[str, List[_QueuedMutation]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        # Zeitpunkt (loop.time) der ersten Änderung, die noch auf ihren Flush wartet
+        self._first_queued: Dict[str, float] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._tasks: set[asyncio.Task] = set()
+        # Statistik: eingereihte Änderungen und tatsächlich gesendete POSTs
+        self.mutation_count = 0
+        self.write_count = 0
+
+    async def async_mutate(
+        self, vehicle_id: str, mutate: PlanMutation, settle: bool = False, fetch: bool = True
+    ) -> tuple:
+        """Reihe eine Änderung ein und warte auf die von EVCC bestätigten Pläne.
+
+        `fetch=False`, wenn der Aufrufer den Stand schon frisch geladen hat
+        (siehe `coordinator.async_write_plans`).
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queues.setdefault(vehicle_id, []).append(_QueuedMutation(mutate, future, fetch))
+        self.mutation_count += 1
+
+        now = loop.time()
+        first = self._first_queued.setdefault(vehicle_id, now)
+        timer = self._timers.get(vehicle_id)
+        if timer is None or timer.when() > now:
+            # Ein bereits fälliger (sofortiger) Flush wird nicht wieder aufgeschoben
+            if timer:
+                timer.cancel()
+            delay = self.settle_time if settle else 0
+            deadline = min(now + delay, first + self.max_latency)
+            self._timers[vehicle_id] = loop.call_at(deadline, self._start_flush, vehicle_id)
+
+        return await future
+
+    async def async_set_field(self, vehicle_id: str, index: int, field: str, value: Any) -> None:
+        """Setze ein Feld eines Plans (1-basierter Index), gebündelt mit Folgeänderungen."""
+
+        def _set_field(plans: List[RepeatingPlan]) -> None:
+            if not 1 <= index <= len(plans):
+                raise ValueError(f"Plan index {index} for vehicle {vehicle_id} out of range")
+            plans[index - 1] = plans[index - 1].with_fields(**{field: value})
+
+        await self.async_mutate(vehicle_id, _set_field, settle=True)
+
+    def _start_flush(self, vehicle_id: str) -> None:
+        self._timers.pop(vehicle_id, None)
+        self._first_queued.pop(vehicle_id, None)
+        task = asyncio.create_task(self._async_flush(vehicle_id))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _async_flush(self, vehicle_id: str) -> None:
+        lock = self._locks.setdefault(vehicle_id, asyncio.Lock())
+        async with lock:
+            batch = self._queues.pop(vehicle_id, [])
+            if not batch:
+                return
+
+            def _apply_batch(plans: List[RepeatingPlan]) -> List[RepeatingPlan]:
+                for item in batch:
+                    candidate = list(plans)
+                    try:
+                        result = item.mutate(candidate)
+                    except Exception as err:
+                        item.error = err
+                        continue
+                    item.error = None
+                    plans = candidate if result is None else result
+                if all(item.error is not None for item in batch):
+                    # Nichts Gültiges zu schreiben → POST abbrechen
+                    raise batch[0].error
+                return plans
+
+            _LOGGER.debug("Writing %d queued plan mutations for vehicle %s", len(batch), vehicle_id)
+            try:
+                plans = await self.coordinator.async_write_plans(
+                    vehicle_id, _apply_batch, fetch=any(item.fetch for item in batch)
+                )
+                self.write_count += 1
+            except Exception as err:
+                for item in batch:
+                    if not item.future.done():
+                        item.future.set_exception(item.error or err)
+                return
+
+            for item in batch:
+                if item.future.done():
+                    continue
+                if item.error is not None:
+                    item.future.set_exception(item.error)
+                else:
+                    item.future.set_result(plans)
+
+    async def async_flush_all(self) -> None:
+        """Schreibe alle offenen Änderungen sofort (z.B. beim Entladen)."""
+        for vehicle_id in list(self._timers):
+            self._timers.pop(vehicle_id).cancel()
+            self._first_queued.pop(vehicle_id, None)
+            await self._async_flush(vehicle_id)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
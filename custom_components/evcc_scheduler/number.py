@@ -5,6 +5,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Coor
 from .entity_manager import EvccEntityManager, setup_platform
 from .base_entity import BaseEvccPlanEntity
 from .mapping import build_entity_id
+from .models import RepeatingPlan
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,7 +33,7 @@ class EvccPlanSoc(BaseEvccPlanEntity, NumberEntity):
     _attr_mode = NumberMode.SLIDER
     _attr_icon = "mdi:battery-charging"
     
-    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: dict, vehicle_title: str) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: RepeatingPlan, vehicle_title: str) -> None:
         super().__init__(coordinator, vehicle_id, index, plan, vehicle_title)
         unique_id = self.make_unique_id("_soc")
         self._attr_unique_id = unique_id
@@ -43,7 +44,7 @@ class EvccPlanSoc(BaseEvccPlanEntity, NumberEntity):
 
     @property
     def native_value(self) -> float | None:
-        return self.plan.get("soc")
+        return self.plan.soc
 
     async def async_set_native_value(self, value: float) -> None:
         """Set new SOC value"""
@@ -67,15 +68,13 @@ class EvccPlanSoc(BaseEvccPlanEntity, NumberEntity):
             vehicle_data = vehicles[self.vehicle_id]
             plans = vehicle_data.get("repeatingPlans", [])
 
-            if self.index - 1 < len(plans):
-                plans[self.index - 1]["soc"] = soc
-                _LOGGER.info("Setting SOC for plan %d of vehicle '%s' to %d%%", self.index, self.vehicle_id, soc)
-            else:
+            if self.index - 1 >= len(plans):
                 _LOGGER.error("Plan index %d out of range", self.index)
                 return
+            _LOGGER.info("Setting SOC for plan %d of vehicle '%s' to %d%%", self.index, self.vehicle_id, soc)
 
-            await self.coordinator.api.set_repeating_plans(self.vehicle_id, plans)
-            await self.coordinator.async_request_refresh()
+            # Über den Write-Buffer schreiben: Slider-Bursts ergeben einen POST pro Fahrzeug
+            await self._async_queue_plan_edit("soc", soc)
         except Exception as err:
             _LOGGER.error("Error setting SOC for plan %d: %s", self.index, err)
             raise
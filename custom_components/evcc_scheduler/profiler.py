@@ -0,0 +1,110 @@
+"""Opt-in-Profiling für Coordinator-Update, Entity-Sync, WS-Klassifizierung und JSON-Decode."""
+import contextlib
+import cProfile
+import json
+import logging
+import time
+from typing import Any, Dict
+
+from .metrics import EvccDurationHistogram
+
+_LOGGER = logging.getLogger(__name__)
+
+# Gemeinsamer No-op-Kontext, solange Profiling aus ist (keine Allokation pro Aufruf)
+_NULL_SPAN = contextlib.nullcontext()
+
+
+class _Span:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: EvccDurationHistogram) -> None:
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class EvccProfiler:
+    """Zeichnet Zeitspannen benannter Abschnitte auf und optional ein cProfile.
+
+    Solange kein Profiling läuft, liefert `span()` einen geteilten No-op-Kontext,
+    die Hot Paths zahlen dann nur einen Methodenaufruf.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.spans: Dict[str, EvccDurationHistogram] = {}
+        self.started_at: float | None = None
+        self._profile: cProfile.Profile | None = None
+        self._stop_handle: Any = None
+
+    def span(self, name: str):
+        """Kontextmanager, der die Dauer des Abschnitts `name` erfasst."""
+        if not self.enabled:
+            return _NULL_SPAN
+        histogram = self.spans.get(name)
+        if histogram is None:
+            histogram = self.spans[name] = EvccDurationHistogram()
+        return _Span(histogram)
+
+    def start(self, hass: Any, duration: float | None = None, use_cprofile: bool = False) -> None:
+        """Starte eine Profiling-Sitzung (optional zeitlich begrenzt)."""
+        if self.enabled:
+            raise RuntimeError("Profiling is already running")
+
+        self.spans = {}
+        self.started_at = time.time()
+        if use_cprofile:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        self.enabled = True
+
+        if duration:
+            self._stop_handle = hass.loop.call_later(
+                duration, lambda: hass.async_create_task(self.async_stop(hass))
+            )
+        _LOGGER.info(
+            "Profiling started (cProfile: %s, duration: %s)",
+            use_cprofile, f"{duration}s" if duration else "until stop_profile",
+        )
+
+    async def async_stop(self, hass: Any) -> Dict[str, Any]:
+        """Beende die Sitzung und schreibe die Ergebnisse ins HA-Konfigurationsverzeichnis."""
+        if not self.enabled:
+            raise RuntimeError("Profiling is not running")
+
+        self.enabled = False
+        if self._stop_handle:
+            self._stop_handle.cancel()
+            self._stop_handle = None
+
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            profile.disable()
+
+        stamp = time.strftime("%Y%m%d_%H%M%S", time.localtime(self.started_at))
+        summary = {
+            "started_at": self.started_at,
+            "duration_s": round(time.time() - self.started_at, 3),
+            "spans": {name: histogram.as_dict() for name, histogram in self.spans.items()},
+        }
+        spans_path = hass.config.path(f"evcc_scheduler_profile_{stamp}_spans.json")
+        await hass.async_add_executor_job(_write_json, spans_path, summary)
+        summary["spans_file"] = spans_path
+
+        if profile is not None:
+            stats_path = hass.config.path(f"evcc_scheduler_profile_{stamp}.prof")
+            await hass.async_add_executor_job(profile.dump_stats, stats_path)
+            summary["cprofile_file"] = stats_path
+
+        _LOGGER.info("Profiling stopped, results written to %s", spans_path)
+        return summary
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as handle:
+        json.dump(data, handle, indent=2)
@@ -0,0 +1,95 @@
+"""Entprellter Refresh-Scheduler zwischen WebSocket-Client und Coordinator."""
+import asyncio
+import logging
+from typing import Awaitable, Callable
+
+from .const import DEFAULT_REFRESH_QUIET_WINDOW, DEFAULT_REFRESH_MAX_LATENCY
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EvccRefreshScheduler:
+    """Bündelt Refresh-Trigger zu genau einem Fetch.
+
+    Jeder Trigger verschiebt den Fetch um `quiet_window` Sekunden. Spätestens
+    `max_latency` Sekunden nach dem ersten Trigger eines Bursts wird trotzdem
+    geladen, damit Dauerfeuer den Refresh nicht beliebig verzögert.
+    """
+
+    def __init__(
+        self,
+        refresh_callback: Callable[[], Awaitable[None]],
+        quiet_window: float = DEFAULT_REFRESH_QUIET_WINDOW,
+        max_latency: float = DEFAULT_REFRESH_MAX_LATENCY,
+    ) -> None:
+        self._refresh_callback = refresh_callback
+        self.quiet_window = quiet_window
+        self.max_latency = max(max_latency, quiet_window)
+        self._timer: asyncio.Handle | None = None
+        self._task: asyncio.Task | None = None
+        self._pending = 0
+        self._first_trigger: float | None = None
+
+        # Statistik
+        self.trigger_count = 0
+        self.fetch_count = 0
+        self.last_absorbed = 0
+
+    @property
+    def pending(self) -> int:
+        """Anzahl der Trigger, die auf den nächsten Fetch warten."""
+        return self._pending
+
+    def trigger(self) -> None:
+        """Fordere einen Refresh an (nicht blockierend)."""
+        loop = asyncio.get_running_loop()
+        now = loop.time()
+        self.trigger_count += 1
+        self._pending += 1
+        if self._first_trigger is None:
+            self._first_trigger = now
+
+        if self._timer:
+            self._timer.cancel()
+        deadline = min(now + self.quiet_window, self._first_trigger + self.max_latency)
+        self._timer = loop.call_at(deadline, self._fire)
+
+    def _fire(self) -> None:
+        self._timer = None
+        if self._task and not self._task.done():
+            # Fetch läuft noch; _run plant nach Abschluss erneut
+            return
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        absorbed = self._pending
+        self._pending = 0
+        self._first_trigger = None
+        self.fetch_count += 1
+        self.last_absorbed = absorbed
+        _LOGGER.debug("Coalesced refresh started (absorbed %d triggers)", absorbed)
+        try:
+            await self._refresh_callback()
+        except asyncio.CancelledError:
+            raise
+        except Exception as err:
+            _LOGGER.error("Error during coalesced refresh: %s", err)
+        finally:
+            # Während des Fetches eingetroffene Trigger ohne laufenden Timer nachholen
+            if self._pending and self._timer is None:
+                self._timer = asyncio.get_running_loop().call_soon(self._fire)
+
+    async def async_shutdown(self) -> None:
+        """Verwerfe ausstehende Trigger und beende einen laufenden Fetch."""
+        if self._timer:
+            self._timer.cancel()
+            self._timer = None
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        self._pending = 0
+        self._first_trigger = None
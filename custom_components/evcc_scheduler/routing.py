@@ -0,0 +1,103 @@
+"""Routing von vehicle_id auf den zuständigen Coordinator (mehrere EVCC-Instanzen)."""
+import logging
+from typing import Any, Callable, Dict, List, Tuple
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class EvccVehicleRouter:
+    """Index vehicle_id → {entry_id: coordinator}, gepflegt bei jedem Coordinator-Update.
+
+    Fahrzeug-IDs sind nur pro EVCC eindeutig ("db:1" gibt es auf jedem Host);
+    kommt eine ID in mehreren Einträgen vor, muss der Aufrufer die entry_id angeben.
+    """
+
+    def __init__(self) -> None:
+        self._coordinators: Dict[str, Any] = {}
+        self._vehicles_by_entry: Dict[str, frozenset] = {}
+        self._index: Dict[str, Dict[str, Any]] = {}
+
+    def async_add_entry(self, entry_id: str, coordinator: Any) -> Callable[[], None]:
+        """Registriere einen Coordinator; gibt eine Funktion zum Abmelden zurück."""
+        self._coordinators[entry_id] = coordinator
+        self._update(entry_id)
+        unsub_listener = coordinator.async_add_listener(lambda: self._update(entry_id))
+
+        def _remove() -> None:
+            unsub_listener()
+            self._remove_entry(entry_id)
+
+        return _remove
+
+    def _update(self, entry_id: str) -> None:
+        coordinator = self._coordinators.get(entry_id)
+        if coordinator is None:
+            return
+        vehicles = frozenset(((coordinator.data or {}).get("vehicles") or {}).keys())
+        previous = self._vehicles_by_entry.get(entry_id, frozenset())
+        if vehicles == previous:
+            return
+
+        for vehicle_id in previous - vehicles:
+            owners = self._index.get(vehicle_id, {})
+            owners.pop(entry_id, None)
+            if not owners:
+                self._index.pop(vehicle_id, None)
+        for vehicle_id in vehicles - previous:
+            self._index.setdefault(vehicle_id, {})[entry_id] = coordinator
+        self._vehicles_by_entry[entry_id] = vehicles
+        _LOGGER.debug("Routing index updated for entry %s (%d vehicles)", entry_id, len(vehicles))
+
+    def _remove_entry(self, entry_id: str) -> None:
+        self._coordinators.pop(entry_id, None)
+        for vehicle_id in self._vehicles_by_entry.pop(entry_id, frozenset()):
+            owners = self._index.get(vehicle_id, {})
+            owners.pop(entry_id, None)
+            if not owners:
+                self._index.pop(vehicle_id, None)
+
+    @property
+    def coordinators(self) -> Dict[str, Any]:
+        """Alle registrierten Coordinators nach entry_id."""
+        return self._coordinators
+
+    def entry_ids(self, vehicle_id: str) -> List[str]:
+        """Einträge, in denen das Fahrzeug aktuell bekannt ist."""
+        return list(self._index.get(vehicle_id, ()))
+
+    def resolve_entry(self, entry_id: str | None = None) -> Tuple[str, Any]:
+        """Coordinator eines Eintrags; ohne entry_id nur eindeutig bei genau einem Eintrag."""
+        if entry_id is not None:
+            coordinator = self._coordinators.get(entry_id)
+            if coordinator is None:
+                raise ValueError(f"Unbekannte entry_id '{entry_id}'")
+            return entry_id, coordinator
+        if not self._coordinators:
+            raise ValueError("Integration nicht initialisiert; bitte erneut laden.")
+        if len(self._coordinators) > 1:
+            raise ValueError(
+                "Mehrere EVCC-Instanzen konfiguriert; bitte 'entry_id' angeben. "
+                f"Verfügbar: {', '.join(self._coordinators)}"
+            )
+        return next(iter(self._coordinators.items()))
+
+    def resolve(self, vehicle_id: str, entry_id: str | None = None) -> Tuple[str, Any]:
+        """Finde (entry_id, coordinator) für ein Fahrzeug in O(1).
+
+        Ist das Fahrzeug (noch) nicht im Index, fällt die Auflösung auf den
+        angegebenen bzw. einzigen Eintrag zurück, damit dessen Validierung mit
+        frischen Daten und verständlicher Fehlermeldung greifen kann.
+        """
+        owners = self._index.get(vehicle_id)
+        if owners:
+            if entry_id is not None:
+                if entry_id in owners:
+                    return entry_id, owners[entry_id]
+                raise ValueError(f"Fahrzeug '{vehicle_id}' ist in Eintrag '{entry_id}' nicht bekannt")
+            if len(owners) == 1:
+                return next(iter(owners.items()))
+            raise ValueError(
+                f"Fahrzeug '{vehicle_id}' existiert in mehreren EVCC-Instanzen; bitte 'entry_id' angeben. "
+                f"Mögliche Einträge: {', '.join(owners)}"
+            )
+        return self.resolve_entry(entry_id)
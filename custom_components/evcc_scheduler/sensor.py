@@ -0,0 +1,162 @@
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import EntityCategory, UnitOfTime
+from .const import DOMAIN, POLL_MODE_POLLING, POLL_MODE_PUSH
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, kw_only=True)
+class EvccDiagnosticSensorDescription(SensorEntityDescription):
+    """Beschreibung eines Diagnose-Sensors mit Zugriffsfunktionen auf den Coordinator."""
+
+    value_fn: Callable[[Any], Any]
+    attributes_fn: Callable[[Any], dict] | None = None
+
+
+def _ws_stat(coordinator: Any, stats: str, key: str) -> int | None:
+    ws = getattr(coordinator, "ws", None)
+    return getattr(ws, stats)[key] if ws else None
+
+
+def _poll_mode_attributes(coordinator: Any) -> dict:
+    ws = coordinator.ws
+    return {
+        "update_interval": coordinator.update_interval.total_seconds(),
+        "mode_changes": coordinator.poll_mode_changes,
+        "ws_connected": ws.connected if ws else False,
+        "ws_last_frame_age": round(time.monotonic() - ws.last_frame_at, 1) if ws and ws.last_frame_at else None,
+    }
+
+
+SENSORS: tuple[EvccDiagnosticSensorDescription, ...] = (
+    EvccDiagnosticSensorDescription(
+        key="refresh_count",
+        translation_key="refresh_count",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.refresh_count,
+        attributes_fn=lambda c: {
+            "failures": c.metrics.refresh_failures,
+            "coalesced_triggers": c.refresh_scheduler.trigger_count,
+            "coalesced_fetches": c.refresh_scheduler.fetch_count,
+        },
+    ),
+    EvccDiagnosticSensorDescription(
+        key="state_fetch_duration",
+        translation_key="state_fetch_duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda c: c.metrics.state_duration.last,
+        attributes_fn=lambda c: c.metrics.state_duration.as_dict(),
+    ),
+    EvccDiagnosticSensorDescription(
+        key="post_duration",
+        translation_key="post_duration",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=1,
+        value_fn=lambda c: c.metrics.post_duration.last,
+        attributes_fn=lambda c: c.metrics.post_duration.as_dict(),
+    ),
+    EvccDiagnosticSensorDescription(
+        key="ws_frames_received",
+        translation_key="ws_frames_received",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.ws_frames_received,
+    ),
+    EvccDiagnosticSensorDescription(
+        key="ws_frames_relevant",
+        translation_key="ws_frames_relevant",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.ws_frames_relevant,
+    ),
+    EvccDiagnosticSensorDescription(
+        key="ws_frames_deduped",
+        translation_key="ws_frames_deduped",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: _ws_stat(c, "dedup_stats", "hits"),
+    ),
+    EvccDiagnosticSensorDescription(
+        key="ws_frames_dropped",
+        translation_key="ws_frames_dropped",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: _ws_stat(c, "buffer_stats", "dropped"),
+        attributes_fn=lambda c: c.ws.buffer_stats if c.ws else {},
+    ),
+    EvccDiagnosticSensorDescription(
+        key="ws_reconnects",
+        translation_key="ws_reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.ws_reconnects,
+    ),
+    EvccDiagnosticSensorDescription(
+        key="poll_mode",
+        translation_key="poll_mode",
+        device_class=SensorDeviceClass.ENUM,
+        options=[POLL_MODE_PUSH, POLL_MODE_POLLING],
+        value_fn=lambda c: c.poll_mode,
+        attributes_fn=_poll_mode_attributes,
+    ),
+    EvccDiagnosticSensorDescription(
+        key="entities_written",
+        translation_key="entities_written",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.entities_written,
+        attributes_fn=lambda c: {"syncs": c.metrics.sync_count, "sync_duration": c.metrics.sync_duration.as_dict()},
+    ),
+    EvccDiagnosticSensorDescription(
+        key="entities_skipped",
+        translation_key="entities_skipped",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda c: c.metrics.entities_skipped,
+    ),
+)
+
+
+async def async_setup_entry(hass: Any, entry: Any, async_add_entities: Callable) -> bool:
+    """Richte Diagnose-Sensoren für die Laufzeit-Metriken auf"""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_entities(EvccDiagnosticSensor(coordinator, entry, description) for description in SENSORS)
+    _LOGGER.debug("Diagnostic sensor platform setup completed")
+    return True
+
+
+class EvccDiagnosticSensor(SensorEntity):
+    """Diagnose-Sensor; liest die Metriken beim Polling (Standard-Scanintervall)."""
+
+    _attr_has_entity_name = True
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    # Ändern sich bei jedem Update (Histogramme, Frame-Alter) → nicht im Recorder speichern
+    _unrecorded_attributes = frozenset({
+        "count",
+        "average_ms",
+        "buckets",
+        "syncs",
+        "sync_duration",
+        "ws_last_frame_age",
+    })
+    entity_description: EvccDiagnosticSensorDescription
+
+    def __init__(self, coordinator: Any, entry: Any, description: EvccDiagnosticSensorDescription) -> None:
+        self.coordinator = coordinator
+        self.entity_description = description
+        self._attr_unique_id = f"{entry.entry_id}_{description.key}"
+
+    @property
+    def native_value(self) -> Any:
+        return self.entity_description.value_fn(self.coordinator)
+
+    @property
+    def extra_state_attributes(self) -> dict | None:
+        if self.entity_description.attributes_fn is None:
+            return None
+        return self.entity_description.attributes_fn(self.coordinator)
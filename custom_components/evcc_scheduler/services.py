@@ -1,29 +1,32 @@
+import asyncio
 import logging
-from homeassistant.core import HomeAssistant, ServiceCall
+from datetime import time as dt_time
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
 from homeassistant.exceptions import ServiceValidationError
-from .const import DOMAIN
+from .const import DOMAIN, DEFAULT_BULK_CONCURRENCY
+from .models import RepeatingPlan, plans_to_user, weekdays_to_mask
+from .profiler import EvccProfiler
 
 _LOGGER = logging.getLogger(__name__)
 
 async def async_setup_services(hass: HomeAssistant):
     """Registriere Services für Plan-Verwaltung"""
 
-    def _get_coordinator():
-        """Hole den aktiven Coordinator oder werfe eine saubere ValidationError."""
-        domain_data = hass.data.get(DOMAIN)
-        if not domain_data:
+    def _get_coordinator(vehicle_id: str | None = None, entry_id: str | None = None):
+        """Finde (entry_id, Coordinator) für ein Fahrzeug über den Routing-Index."""
+        router = hass.data.get("evcc_scheduler_router")
+        if not router or not hass.data.get(DOMAIN):
             raise ServiceValidationError("Integration nicht initialisiert; bitte erneut laden.")
+        try:
+            if vehicle_id is None:
+                return router.resolve_entry(entry_id)
+            return router.resolve(vehicle_id, entry_id)
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from None
 
-        coordinator = next(iter(domain_data.values()), None)
-        if not coordinator:
-            raise ServiceValidationError("Kein aktiver Coordinator gefunden; bitte Integration neu laden.")
-
-        return coordinator
-
-    async def _get_vehicles(coordinator) -> dict:
-        """Hole Fahrzeuge-Daten aus EVCC-State (ein API-Call)."""
-        evcc_state = await coordinator.api.get_state()
-        return evcc_state.get("vehicles", {})
+    async def _get_vehicles(coordinator, vehicle_id: str | None) -> dict:
+        """Fahrzeuge aus dem Coordinator-Cache (API-Call nur, wenn veraltet)."""
+        return await coordinator.async_get_vehicles(vehicle_id)
 
     def _ensure_vehicle_exists(all_vehicles: dict, vehicle_id: str) -> None:
         """Validiere, dass das Fahrzeug existiert, sonst ServiceValidationError werfen."""
@@ -49,7 +52,7 @@ async def async_setup_services(hass: HomeAssistant):
 
         return idx_1_based - 1
 
-    def _validate_time(value: str) -> str:
+    def _validate_time(value: str) -> dt_time:
         if not isinstance(value, str):
             raise ServiceValidationError("'time' muss ein String im Format HH:MM sein")
         parts = value.split(":")
@@ -62,9 +65,10 @@ async def async_setup_services(hass: HomeAssistant):
             raise ServiceValidationError("'time' muss Zahlen im Format HH:MM enthalten") from None
         if not (0 <= hour <= 23 and 0 <= minute <= 59):
             raise ServiceValidationError("'time' muss eine gültige Uhrzeit (00:00-23:59) sein")
-        return f"{hour:02d}:{minute:02d}"
+        return dt_time(hour, minute)
 
-    def _validate_weekdays(value) -> list[int]:
+    def _validate_weekdays(value) -> int:
+        """Wochentage in User-Schreibweise (1=Montag … 7=Sonntag) → Bitmaske."""
         if not isinstance(value, (list, tuple)):
             raise ServiceValidationError("'weekdays' muss eine Liste von Wochentagen (1-7) sein")
         cleaned: list[int] = []
@@ -78,7 +82,7 @@ async def async_setup_services(hass: HomeAssistant):
             cleaned.append(day_int)
         if not cleaned:
             raise ServiceValidationError("'weekdays' darf nicht leer sein")
-        return cleaned
+        return weekdays_to_mask(cleaned, user=True)
 
     def _validate_soc(value) -> int:
         try:
@@ -109,36 +113,29 @@ async def async_setup_services(hass: HomeAssistant):
             raise ServiceValidationError("'precondition' muss 0, 1 oder 2 sein")
         return precondition_int
 
-    async def set_repeating_plan(call: ServiceCall):
-        """Erstelle oder aktualisiere einen Plan"""
-        coordinator = _get_coordinator()
-        vehicle_id = call.data["vehicle_id"]
-        plan_index = call.data.get("plan_index")
-
-        # Hole den aktuellen EVCC-State für Validierung
-        all_vehicles = await _get_vehicles(coordinator)
-        _ensure_vehicle_exists(all_vehicles, vehicle_id)
-
-        # Hole die Pläne aus dem bereits geladenen State (vermeidet zweiten API-Call)
-        vehicle_data = all_vehicles.get(vehicle_id, {})
-        plans = list(vehicle_data.get("repeatingPlans", []))
+    def _build_plan(data, is_new: bool) -> dict:
+        """Validiere Plan-Felder aus Service-Daten.
 
+        Liefert RepeatingPlan-Felder, z.B. für `RepeatingPlan(**fields)` oder `plan.with_fields(**fields)`.
+        Nur neue Pläne bekommen Defaults für tz/precondition; Änderungen enthalten
+        ausschließlich die übergebenen Felder, damit der Rest des Plans erhalten bleibt.
+        """
         new_plan = {}
-        if "time" in call.data:
-            new_plan["time"] = _validate_time(call.data["time"])
-        if "weekdays" in call.data:
-            new_plan["weekdays"] = _validate_weekdays(call.data["weekdays"])
-        if "soc" in call.data:
-            new_plan["soc"] = _validate_soc(call.data["soc"])
-        if "active" in call.data:
-            new_plan["active"] = _validate_active(call.data["active"])
-
-        if "tz" in call.data:
-            tz_val = call.data["tz"]
+        if "time" in data:
+            new_plan["time"] = _validate_time(data["time"])
+        if "weekdays" in data:
+            new_plan["weekdays"] = _validate_weekdays(data["weekdays"])
+        if "soc" in data:
+            new_plan["soc"] = _validate_soc(data["soc"])
+        if "active" in data:
+            new_plan["active"] = _validate_active(data["active"])
+
+        if "tz" in data:
+            tz_val = data["tz"]
             if not isinstance(tz_val, str) or not tz_val:
                 raise ServiceValidationError("'tz' muss eine IANA-Zeitzone sein, z.B. 'Europe/Berlin'")
             new_plan["tz"] = tz_val
-        else:
+        elif is_new:
             # Verwende Home Assistant Timezone als Default
             ha_tz = hass.config.time_zone
             if ha_tz:
@@ -150,10 +147,11 @@ async def async_setup_services(hass: HomeAssistant):
                     "Bitte 'tz' angeben oder HA Zeitzone setzen."
                 )
 
-        # Precondition mit Default 0
-        new_plan["precondition"] = _validate_precondition(call.data.get("precondition", 0))
+        # Precondition mit Default 0 (nur für neue Pläne)
+        if "precondition" in data or is_new:
+            new_plan["precondition"] = _validate_precondition(data.get("precondition", 0))
 
-        if plan_index is None:
+        if is_new:
             # Neuer Plan: Pflichtfelder prüfen
             required_fields = ["time", "weekdays", "soc", "active"]
             missing = [f for f in required_fields if f not in new_plan]
@@ -162,49 +160,193 @@ async def async_setup_services(hass: HomeAssistant):
                     "Fehlende Pflichtfelder für neuen Plan: " + ", ".join(missing)
                 )
 
-            plans.append(new_plan)
-            _LOGGER.info("Added new plan for vehicle %s", vehicle_id)
-        else:
-            # Existierenden Plan aktualisieren (plan_index ist 1-basiert für UI)
-            idx = _parse_plan_index(plan_index, len(plans))
-            plans[idx] = {**plans[idx], **new_plan}
-            _LOGGER.info("Updated plan %d for vehicle %s", plan_index, vehicle_id)
+        return new_plan
 
-        await coordinator.api.set_repeating_plans(vehicle_id, plans)
-        await coordinator.async_request_refresh()
+    async def set_repeating_plan(call: ServiceCall):
+        """Erstelle oder aktualisiere einen Plan"""
+        vehicle_id = call.data["vehicle_id"]
+        entry_id, coordinator = _get_coordinator(vehicle_id, call.data.get("entry_id"))
+        plan_index = call.data.get("plan_index")
+
+        # Validierung gegen die gecachten Fahrzeuge des Coordinators
+        all_vehicles = await _get_vehicles(coordinator, vehicle_id)
+        _ensure_vehicle_exists(all_vehicles, vehicle_id)
+
+        new_plan = _build_plan(call.data, is_new=plan_index is None)
+
+        def _apply(plans: list) -> None:
+            if plan_index is None:
+                plans.append(RepeatingPlan(**new_plan))
+                _LOGGER.info("Added new plan for vehicle %s", vehicle_id)
+            else:
+                # Existierenden Plan aktualisieren (plan_index ist 1-basiert für UI)
+                idx = _parse_plan_index(plan_index, len(plans))
+                plans[idx] = plans[idx].with_fields(**new_plan)
+                _LOGGER.info("Updated plan %d for vehicle %s", plan_index, vehicle_id)
+
+        # Seriell pro Fahrzeug, auf Basis des Caches; Antwort wird direkt übernommen
+        plans = await coordinator.mutation_queue.async_mutate(vehicle_id, _apply)
 
         # Broadcast WebSocket-Event
-        await _broadcast_plans_updated(hass, vehicle_id, plans)
+        await _broadcast_plans_updated(hass, vehicle_id, plans, entry_id)
 
     async def del_repeating_plan(call: ServiceCall):
         """Lösche einen Plan"""
-        coordinator = _get_coordinator()
         vehicle_id = call.data["vehicle_id"]
+        entry_id, coordinator = _get_coordinator(vehicle_id, call.data.get("entry_id"))
 
-        # Hole den aktuellen EVCC-State für Validierung
-        all_vehicles = await _get_vehicles(coordinator)
+        # Validierung gegen die gecachten Fahrzeuge des Coordinators
+        all_vehicles = await _get_vehicles(coordinator, vehicle_id)
         _ensure_vehicle_exists(all_vehicles, vehicle_id)
 
-        # Hole die Pläne aus dem bereits geladenen State (vermeidet zweiten API-Call)
-        vehicle_data = all_vehicles.get(vehicle_id, {})
-        plans = list(vehicle_data.get("repeatingPlans", []))
-        plan_index = _parse_plan_index(call.data.get("plan_index"), len(plans))
-
-        plans.pop(plan_index)
-        _LOGGER.info("Deleted plan %d for vehicle %s", plan_index + 1, vehicle_id)
+        def _apply(plans: list) -> None:
+            plan_index = _parse_plan_index(call.data.get("plan_index"), len(plans))
+            plans.pop(plan_index)
+            _LOGGER.info("Deleted plan %d for vehicle %s", plan_index + 1, vehicle_id)
 
-        await coordinator.api.set_repeating_plans(vehicle_id, plans)
-        await coordinator.async_request_refresh()
+        plans = await coordinator.mutation_queue.async_mutate(vehicle_id, _apply)
 
         # Broadcast WebSocket-Event
-        await _broadcast_plans_updated(hass, vehicle_id, plans)
+        await _broadcast_plans_updated(hass, vehicle_id, plans, entry_id)
+
+    async def _parse_bulk_entry(position: int, entry, default_entry_id: str | None, fetched: dict) -> tuple:
+        """Validiere einen Eintrag von bulk_set_plans → (entry_id, coordinator, vehicle_id, plans|None, patches).
+
+        `position` ist 1-basiert und steht in jeder Fehlermeldung.
+        """
+        if not isinstance(entry, dict) or "vehicle_id" not in entry:
+            raise ServiceValidationError(f"Eintrag {position} in 'vehicles' braucht eine 'vehicle_id'")
+        vehicle_id = entry["vehicle_id"]
+        entry_id, coordinator = _get_coordinator(vehicle_id, entry.get("entry_id", default_entry_id))
+        if entry_id not in fetched:
+            # Ein Fetch pro EVCC-Instanz; die Schreibvorgänge bauen auf diesem Stand auf
+            fetched[entry_id] = await coordinator.async_get_vehicles_for_write()
+        _ensure_vehicle_exists(fetched[entry_id], vehicle_id)
+
+        where = f"Eintrag {position} ('{vehicle_id}')"
+        if "plans" not in entry and "patches" not in entry:
+            raise ServiceValidationError(f"{where}: 'plans' oder 'patches' fehlen")
+
+        plans = None
+        if "plans" in entry:
+            if not isinstance(entry["plans"], (list, tuple)):
+                raise ServiceValidationError(f"{where}: 'plans' muss eine Liste sein")
+            plans = []
+            for number, plan in enumerate(entry["plans"], 1):
+                if not isinstance(plan, dict):
+                    raise ServiceValidationError(f"{where}: Plan {number} muss ein Objekt sein")
+                try:
+                    plans.append(RepeatingPlan(**_build_plan(plan, is_new=True)))
+                except ServiceValidationError as err:
+                    raise ServiceValidationError(f"{where}, Plan {number}: {err}") from None
+
+        patches = []
+        raw_patches = entry.get("patches", [])
+        if not isinstance(raw_patches, (list, tuple)):
+            raise ServiceValidationError(f"{where}: 'patches' muss eine Liste sein")
+        for number, patch in enumerate(raw_patches, 1):
+            if not isinstance(patch, dict) or "plan_index" not in patch:
+                raise ServiceValidationError(f"{where}: Patch {number} muss ein Objekt mit 'plan_index' sein")
+            try:
+                patches.append((_parse_plan_index(patch["plan_index"]), _build_plan(patch, is_new=False)))
+            except ServiceValidationError as err:
+                raise ServiceValidationError(f"{where}, Patch {number}: {err}") from None
+
+        return entry_id, coordinator, vehicle_id, plans, patches
+
+    async def bulk_set_plans(call: ServiceCall) -> ServiceResponse:
+        """Ersetze oder patche Pläne mehrerer Fahrzeuge in einem Aufruf"""
+        entries = call.data.get("vehicles")
+        if not isinstance(entries, (list, tuple)) or not entries:
+            raise ServiceValidationError("'vehicles' muss eine nicht-leere Liste sein")
+
+        # Alles vorab validieren, damit ein Fehler nichts halb schreibt
+        default_entry_id = call.data.get("entry_id")
+        fetched: dict = {}
+        jobs = [
+            await _parse_bulk_entry(position, entry, default_entry_id, fetched)
+            for position, entry in enumerate(entries, 1)
+        ]
+        targets = [(entry_id, vehicle_id) for entry_id, _, vehicle_id, _, _ in jobs]
+        if len(set(targets)) != len(targets):
+            raise ServiceValidationError("Jedes Fahrzeug darf in 'vehicles' nur einmal vorkommen")
+
+        semaphore = asyncio.Semaphore(DEFAULT_BULK_CONCURRENCY)
+
+        async def _run(entry_id: str, coordinator, vehicle_id: str, new_plans: list | None, patches: list) -> dict:
+            def _apply(plans: list) -> list:
+                if new_plans is not None:
+                    plans = list(new_plans)
+                for idx, fields in patches:
+                    if idx >= len(plans):
+                        raise ServiceValidationError(f"Plan-Index {idx + 1} ungültig")
+                    plans[idx] = plans[idx].with_fields(**fields)
+                return plans
+
+            async with semaphore:
+                try:
+                    # Stand wurde oben schon einmal pro Instanz geladen
+                    plans = await coordinator.mutation_queue.async_mutate(vehicle_id, _apply, fetch=False)
+                except Exception as err:
+                    _LOGGER.error("Bulk update for vehicle %s failed: %s", vehicle_id, err)
+                    return {"entry_id": entry_id, "success": False, "error": str(err)}
+            await _broadcast_plans_updated(hass, vehicle_id, plans, entry_id)
+            return {"entry_id": entry_id, "success": True, "plans": plans_to_user(plans)}
+
+        # Bestätigte Pläne landen direkt im Cache, ein abschließender Refresh ist unnötig
+        results = await asyncio.gather(*(_run(*job) for job in jobs))
+
+        _LOGGER.info(
+            "Bulk plan update: %d of %d vehicles succeeded",
+            sum(1 for result in results if result["success"]), len(results),
+        )
+        # Gleiche vehicle_id in mehreren Instanzen → Schlüssel um die entry_id ergänzen
+        vehicle_ids = [vehicle_id for _, vehicle_id in targets]
+        return {
+            "results": {
+                vehicle_id if vehicle_ids.count(vehicle_id) == 1 else f"{vehicle_id}@{entry_id}": result
+                for (entry_id, vehicle_id), result in zip(targets, results)
+            }
+        }
+
+    def _get_profiler() -> EvccProfiler:
+        return hass.data.setdefault("evcc_scheduler_profiler", EvccProfiler())
+
+    async def start_profile(call: ServiceCall):
+        """Starte Profiling (Zeitspannen, optional cProfile)"""
+        duration = call.data.get("duration")
+        if duration is not None:
+            try:
+                duration = float(duration)
+            except (TypeError, ValueError):
+                raise ServiceValidationError("'duration' muss eine Zahl (Sekunden) sein") from None
+            if duration <= 0:
+                raise ServiceValidationError("'duration' muss > 0 sein")
+        try:
+            _get_profiler().start(hass, duration, bool(call.data.get("cprofile", False)))
+        except RuntimeError:
+            raise ServiceValidationError("Profiling läuft bereits; zuerst stop_profile aufrufen") from None
+
+    async def stop_profile(call: ServiceCall) -> ServiceResponse:
+        """Beende Profiling und schreibe die Ergebnisse ins Konfigurationsverzeichnis"""
+        try:
+            return await _get_profiler().async_stop(hass)
+        except RuntimeError:
+            raise ServiceValidationError("Es läuft kein Profiling") from None
 
     hass.services.async_register(DOMAIN, "set_repeating_plan", set_repeating_plan)
     hass.services.async_register(DOMAIN, "del_repeating_plan", del_repeating_plan)
+    hass.services.async_register(
+        DOMAIN, "bulk_set_plans", bulk_set_plans, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(DOMAIN, "start_profile", start_profile)
+    hass.services.async_register(
+        DOMAIN, "stop_profile", stop_profile, supports_response=SupportsResponse.OPTIONAL
+    )
 
 
-async def _broadcast_plans_updated(hass: HomeAssistant, vehicle_id: str, plans: list) -> None:
-    """Sende WebSocket-Event bei Plan-Änderung"""
+async def _broadcast_plans_updated(hass: HomeAssistant, vehicle_id: str, plans: tuple, entry_id: str | None = None) -> None:
+    """Sende WebSocket-Event bei Plan-Änderung (Wochentage wie bei der Card 1-7)"""
     from .websocket_api import EvccWebSocketAPI
 
     api = hass.data.get("evcc_scheduler_ws_api")
@@ -213,7 +355,8 @@ async def _broadcast_plans_updated(hass: HomeAssistant, vehicle_id: str, plans:
 
     await api.broadcast({
         "type": "plans_updated",
+        "entry_id": entry_id,
         "vehicle_id": vehicle_id,
-        "plans": plans
+        "plans": plans_to_user(plans)
     })
 
@@ -5,6 +5,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Coor
 from .entity_manager import EvccEntityManager, setup_platform
 from .base_entity import BaseEvccPlanEntity
 from .mapping import build_entity_id
+from .models import RepeatingPlan
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,7 +27,7 @@ async def async_setup_entry(hass: Any, entry: Any, async_add_entities: Callable)
 class EvccPlanSwitch(BaseEvccPlanEntity, SwitchEntity):
     _attr_translation_key = "repeating_plan_active"
     
-    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: dict, vehicle_title: str) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: RepeatingPlan, vehicle_title: str) -> None:
         super().__init__(coordinator, vehicle_id, index, plan, vehicle_title)
         unique_id = self.make_unique_id("_active")
         self._attr_unique_id = unique_id
@@ -37,12 +38,14 @@ class EvccPlanSwitch(BaseEvccPlanEntity, SwitchEntity):
 
     @property
     def is_on(self) -> bool:
-        return self.plan.get("active", False)
+        return bool(self.plan.active)
 
     @property
     def extra_state_attributes(self) -> dict:
         attrs = super().extra_state_attributes
-        attrs.update(self.plan or {})
+        # Plan-Details wie bisher in EVCC-Schreibweise (weekdays: 0=Sonntag)
+        attrs.update(self.plan.to_evcc())
+        attrs["weekdays_iso"] = self.plan.user_weekdays
         return attrs
 
     async def async_turn_on(self, **kwargs: Any) -> None:
@@ -69,19 +72,13 @@ class EvccPlanSwitch(BaseEvccPlanEntity, SwitchEntity):
             vehicle_data = vehicles[self.vehicle_id]
             plans = vehicle_data.get("repeatingPlans", [])
 
-            # Aktualisiere nur diesen Plan
-            if self.index - 1 < len(plans):
-                plans[self.index - 1]["active"] = active
-                _LOGGER.info("Toggling plan %d for vehicle '%s' to %s", self.index, self.vehicle_id, active)
-            else:
+            if self.index - 1 >= len(plans):
                 _LOGGER.error("Plan index %d for vehicle %s out of range", self.index, self.vehicle_id)
                 return
+            _LOGGER.info("Toggling plan %d for vehicle '%s' to %s", self.index, self.vehicle_id, active)
 
-            # Schreibe alle Pläne zurück zur API
-            await self.coordinator.api.set_repeating_plans(self.vehicle_id, plans)
-
-            # Refresh Coordinator → alle Entities updaten
-            await self.coordinator.async_request_refresh()
+            # Über den Write-Buffer schreiben: schnelle Toggles ergeben einen POST pro Fahrzeug
+            await self._async_queue_plan_edit("active", active)
         except Exception as err:
             _LOGGER.error("Error toggling plan %d for vehicle %s: %s", self.index, self.vehicle_id, err)
             raise
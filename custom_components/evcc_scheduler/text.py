@@ -5,6 +5,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Coor
 from .entity_manager import EvccEntityManager, setup_platform
 from .base_entity import BaseEvccPlanEntity
 from .mapping import build_entity_id
+from .models import RepeatingPlan, mask_to_weekdays, weekdays_to_mask
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -26,7 +27,7 @@ async def async_setup_entry(hass: Any, entry: Any, async_add_entities: Callable)
 class EvccPlanWeekdays(BaseEvccPlanEntity, TextEntity):
     _attr_translation_key = "repeating_plan_weekdays"
     
-    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: dict, vehicle_title: str) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: RepeatingPlan, vehicle_title: str) -> None:
         super().__init__(coordinator, vehicle_id, index, plan, vehicle_title)
         unique_id = self.make_unique_id("_weekdays")
         self._attr_unique_id = unique_id
@@ -37,11 +38,8 @@ class EvccPlanWeekdays(BaseEvccPlanEntity, TextEntity):
 
     @property
     def native_value(self) -> str:
-        weekdays = self.plan.get("weekdays", [])
-        if not weekdays:
-            return ""
-        # Konvertiere Liste zu kommagetrennt: [1, 2, 3] -> "1,2,3"
-        return ",".join(str(day) for day in weekdays)
+        # Bitmaske → kommagetrennt in EVCC-Schreibweise: "0,1,2" (0=Sonntag, wie bisher)
+        return ",".join(str(day) for day in mask_to_weekdays(self.plan.weekdays or 0))
 
     async def async_set_value(self, value: str) -> None:
         """Set new weekdays value"""
@@ -49,10 +47,11 @@ class EvccPlanWeekdays(BaseEvccPlanEntity, TextEntity):
             # Konvertiere "1,2,3" -> [1, 2, 3]
             weekdays = [int(day.strip()) for day in value.split(",") if day.strip()]
             
-            # Validiere Werte (1-7)
-            if not all(1 <= day <= 7 for day in weekdays):
-                _LOGGER.error("Invalid weekdays: must be between 1 and 7")
+            # Validiere Werte (EVCC 0-6, 7 wird wie bisher als Sonntag akzeptiert)
+            if not all(0 <= day <= 7 for day in weekdays):
+                _LOGGER.error("Invalid weekdays: must be between 0 and 7")
                 return
+            mask = weekdays_to_mask(day % 7 for day in weekdays)
             
             coordinator_data = self.coordinator.data
             if not coordinator_data or "vehicles" not in coordinator_data:
@@ -67,15 +66,13 @@ class EvccPlanWeekdays(BaseEvccPlanEntity, TextEntity):
             vehicle_data = vehicles[self.vehicle_id]
             plans = vehicle_data.get("repeatingPlans", [])
 
-            if self.index - 1 < len(plans):
-                plans[self.index - 1]["weekdays"] = weekdays
-                _LOGGER.info("Setting weekdays for plan %d of vehicle '%s' to %s", self.index, self.vehicle_id, weekdays)
-            else:
+            if self.index - 1 >= len(plans):
                 _LOGGER.error("Plan index %d out of range", self.index)
                 return
+            _LOGGER.info("Setting weekdays for plan %d of vehicle '%s' to %s", self.index, self.vehicle_id, weekdays)
 
-            await self.coordinator.api.set_repeating_plans(self.vehicle_id, plans)
-            await self.coordinator.async_request_refresh()
+            # Gebündelt mit anderen offenen Änderungen dieses Fahrzeugs schreiben
+            await self._async_queue_plan_edit("weekdays", mask)
         except ValueError as err:
             _LOGGER.error("Invalid weekdays format: %s", err)
             raise
@@ -86,5 +83,7 @@ class EvccPlanWeekdays(BaseEvccPlanEntity, TextEntity):
     @property
     def extra_state_attributes(self) -> dict:
         attrs = super().extra_state_attributes
-        attrs["weekdays_list"] = self.plan.get("weekdays", [])
+        attrs["weekdays_list"] = mask_to_weekdays(self.plan.weekdays or 0)
+        # Zusätzlich wie Services und Card: 1=Montag … 7=Sonntag
+        attrs["weekdays_iso"] = self.plan.user_weekdays
         return attrs
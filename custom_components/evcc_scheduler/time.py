@@ -6,6 +6,7 @@ from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, Coor
 from .entity_manager import EvccEntityManager, setup_platform
 from .base_entity import BaseEvccPlanEntity
 from .mapping import build_entity_id
+from .models import RepeatingPlan
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -28,7 +29,7 @@ class EvccPlanTime(BaseEvccPlanEntity, TimeEntity):
     _attr_translation_key = "repeating_plan_time"
     _attr_icon = "mdi:clock-digital"
     
-    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: dict, vehicle_title: str) -> None:
+    def __init__(self, coordinator: DataUpdateCoordinator, vehicle_id: str, index: int, plan: RepeatingPlan, vehicle_title: str) -> None:
         super().__init__(coordinator, vehicle_id, index, plan, vehicle_title)
         unique_id = self.make_unique_id("_time")
         self._attr_unique_id = unique_id
@@ -39,14 +40,7 @@ class EvccPlanTime(BaseEvccPlanEntity, TimeEntity):
 
     @property
     def native_value(self) -> dt_time | None:
-        time_str = self.plan.get("time")
-        if not time_str:
-            return None
-        try:
-            hour, minute = map(int, time_str.split(":"))
-            return dt_time(hour=hour, minute=minute)
-        except (ValueError, AttributeError):
-            return None
+        return self.plan.time
 
     async def async_set_value(self, value: dt_time) -> None:
         """Set new time value"""
@@ -66,15 +60,13 @@ class EvccPlanTime(BaseEvccPlanEntity, TimeEntity):
             vehicle_data = vehicles[self.vehicle_id]
             plans = vehicle_data.get("repeatingPlans", [])
 
-            if self.index - 1 < len(plans):
-                plans[self.index - 1]["time"] = time_str
-                _LOGGER.info("Setting time for plan %d of vehicle '%s' to %s", self.index, self.vehicle_id, time_str)
-            else:
+            if self.index - 1 >= len(plans):
                 _LOGGER.error("Plan index %d out of range", self.index)
                 return
+            _LOGGER.info("Setting time for plan %d of vehicle '%s' to %s", self.index, self.vehicle_id, time_str)
 
-            await self.coordinator.api.set_repeating_plans(self.vehicle_id, plans)
-            await self.coordinator.async_request_refresh()
+            # Gebündelt mit anderen offenen Änderungen dieses Fahrzeugs schreiben
+            await self._async_queue_plan_edit("time", value.replace(second=0, microsecond=0))
         except Exception as err:
             _LOGGER.error("Error setting time for plan %d: %s", self.index, err)
             raise
@@ -2,36 +2,116 @@
 import asyncio
 import json
 import logging
-from typing import Any, Callable, Dict, Set, Optional
+from typing import Any, Callable, Dict, List, Set
 
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.components import websocket_api
 
-from .const import DOMAIN
+from . import codec
+from .const import DOMAIN, DEFAULT_WS_CLIENT_QUEUE
+from .models import RepeatingPlan, parse_time, plans_to_user, weekdays_to_mask
 
 _LOGGER = logging.getLogger(__name__)
 
+class _ClientSender:
+    """Ausgehende Queue mit eigenem Writer-Task für einen Client."""
+
+    def __init__(self, ws: Any, max_queue: int) -> None:
+        self.ws = ws
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.task = asyncio.create_task(self._writer())
+        self.sent = 0
+
+    async def _writer(self) -> None:
+        while True:
+            msg = await self.queue.get()
+            await self.ws.send(msg)
+            self.sent += 1
+
+    def close(self) -> None:
+        self.task.cancel()
+
+
 class EvccWebSocketAPI:
-    """WebSocket API Server für EVCC Scheduler Card"""
+    """WebSocket API Server für EVCC Scheduler Card
 
-    def __init__(self, hass: HomeAssistant):
+    Jeder Client hat eine begrenzte Sende-Queue und einen eigenen Writer-Task.
+    Ein Broadcast kodiert die Nachricht einmal und legt sie nur in die Queues;
+    langsame Clients blockieren damit weder andere Clients noch den Aufrufer.
+    Läuft die Queue eines Clients voll (oder schlägt ein Senden fehl), wird er getrennt.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_queue: int = DEFAULT_WS_CLIENT_QUEUE):
         self.hass = hass
+        self.max_queue = max_queue
         self.clients: Set[Any] = set()
+        self._senders: Dict[Any, _ClientSender] = {}
         self._handlers: Dict[str, Callable] = {}
+        self._close_tasks: Set[asyncio.Task] = set()
+        # Statistik: wegen voller Queue/Sendefehler getrennte Clients
+        self.evicted = 0
 
     def register_handler(self, msg_type: str, handler: Callable) -> None:
         """Registriere einen Message-Handler"""
         self._handlers[msg_type] = handler
 
+    def _add_client(self, ws: Any) -> _ClientSender:
+        sender = _ClientSender(ws, self.max_queue)
+        sender.task.add_done_callback(lambda task: self._on_writer_done(ws, task))
+        self._senders[ws] = sender
+        self.clients.add(ws)
+        return sender
+
+    def _remove_client(self, ws: Any) -> _ClientSender | None:
+        self.clients.discard(ws)
+        sender = self._senders.pop(ws, None)
+        if sender:
+            sender.close()
+        return sender
+
+    def _on_writer_done(self, ws: Any, task: asyncio.Task) -> None:
+        if task.cancelled() or ws not in self._senders:
+            return
+        _LOGGER.debug("Error sending to client: %s", task.exception())
+        self._evict(ws)
+
+    def _evict(self, ws: Any) -> None:
+        if self._remove_client(ws) is None:
+            return
+        self.evicted += 1
+        _LOGGER.debug("Evicted slow WebSocket client. Total clients: %d", len(self.clients))
+        # Schließen im Hintergrund, damit der Broadcast nicht auf den Client wartet
+        task = asyncio.create_task(self._close_client(ws))
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    @staticmethod
+    async def _close_client(ws: Any) -> None:
+        try:
+            await ws.close()
+        except Exception as e:
+            _LOGGER.debug("Error closing client: %s", e)
+
+    def _enqueue(self, ws: Any, msg: str) -> None:
+        sender = self._senders.get(ws)
+        if sender is None:
+            return
+        try:
+            sender.queue.put_nowait(msg)
+        except asyncio.QueueFull:
+            self._evict(ws)
+
     async def handle_client(self, ws: Any) -> None:
         """Handle WebSocket client connection"""
-        self.clients.add(ws)
+        self._add_client(ws)
         _LOGGER.debug("WebSocket client connected. Total clients: %d", len(self.clients))
 
         try:
             async for msg in ws:
                 try:
-                    data = json.loads(msg)
+                    data = codec.loads(msg)
                     await self._handle_message(data, ws)
                 except json.JSONDecodeError:
                     _LOGGER.warning("Invalid JSON received: %s", msg)
@@ -40,7 +120,7 @@ class EvccWebSocketAPI:
         except asyncio.CancelledError:
             pass
         finally:
-            self.clients.discard(ws)
+            self._remove_client(ws)
             _LOGGER.debug("WebSocket client disconnected. Total clients: %d", len(self.clients))
 
     async def _handle_message(self, data: Dict[str, Any], ws: Any) -> None:
@@ -55,267 +135,290 @@ class EvccWebSocketAPI:
         response = await handler(data)
         
         if response:
-            await ws.send(json.dumps(response))
+            # Über die Queue, damit Antworten und Broadcasts in Reihenfolge bleiben
+            self._enqueue(ws, codec.dumps(response))
 
     async def broadcast(self, data: Dict[str, Any]) -> None:
-        """Sende eine Nachricht an alle verbundenen Clients"""
+        """Sende eine Nachricht an alle verbundenen Clients (ohne auf sie zu warten)"""
         if not self.clients:
             return
 
-        msg = json.dumps(data)
-        
-        # Entferne disconnected clients
-        disconnected = set()
-        for client in self.clients:
-            try:
-                await client.send(msg)
-            except Exception as e:
-                _LOGGER.debug("Error sending to client: %s", e)
-                disconnected.add(client)
-        
-        self.clients -= disconnected
+        msg = codec.dumps(data)
+        for client in list(self.clients):
+            self._enqueue(client, msg)
 
     async def close_all(self) -> None:
         """Schließe alle Clients"""
-        for client in list(self.clients):
-            try:
-                await client.close()
-            except Exception as e:
-                _LOGGER.debug("Error closing client: %s", e)
+        clients = list(self.clients)
+        for client in clients:
+            self._remove_client(client)
+        await asyncio.gather(*(self._close_client(client) for client in clients))
         self.clients.clear()
 
 
 # --- Home Assistant WebSocket API Commands ---
 
 
-def _get_coordinator(hass: HomeAssistant):
-    domain_data = hass.data.get(DOMAIN)
-    if not domain_data:
+def _get_router(hass: HomeAssistant):
+    router = hass.data.get("evcc_scheduler_router")
+    if not router or not hass.data.get(DOMAIN):
         raise ValueError("Coordinator not initialized")
-    # Single entry supported → nimm den ersten
-    return next(iter(domain_data.values()))
+    return router
+
 
+def _resolve_target(hass: HomeAssistant, msg: Dict[str, Any]) -> tuple:
+    """Bestimme (entry_id, coordinator, vehicle_id) für ein Kommando.
 
-def _convert_weekdays_to_user(weekdays: Optional[list]) -> Optional[list]:
-    """Konvertiere Wochentage von EVCC-Format (0-6) zu User-Format (1-7).
-    
-    EVCC: 0=Sonntag, 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag
-    User: 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag, 7=Sonntag
+    Ohne vehicle_id (Karte ohne Fahrzeugauswahl) wird das erste Fahrzeug
+    genommen; das ist nur bei genau einer EVCC-Instanz eindeutig.
     """
-    if not weekdays:
-        return weekdays
-    converted = []
-    for day in weekdays:
-        if isinstance(day, int):
-            # 0 (Sonntag) → 7, sonst unverändert
-            converted.append(7 if day == 0 else day)
-        else:
-            converted.append(day)
-    return converted
-
-
-def _convert_weekdays_to_api(weekdays: Optional[list]) -> Optional[list]:
-    """Konvertiere Wochentage von User-Format (1-7) zu EVCC-Format (0-6).
-    
-    User: 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag, 7=Sonntag
-    EVCC: 0=Sonntag, 1=Montag, 2=Dienstag, 3=Mittwoch, 4=Donnerstag, 5=Freitag, 6=Samstag
+    router = _get_router(hass)
+    vehicle_id = msg.get("vehicle_id")
+    if vehicle_id is not None:
+        entry_id, coordinator = router.resolve(vehicle_id, msg.get("entry_id"))
+        return entry_id, coordinator, vehicle_id
+
+    entry_id, coordinator = router.resolve_entry(msg.get("entry_id"))
+    vehicles = (coordinator.data or {}).get("vehicles", {})
+    if not vehicles:
+        raise ValueError("Kein Fahrzeug geladen")
+    return entry_id, coordinator, next(iter(vehicles.keys()))
+
+
+_TARGET_SCHEMA = {vol.Optional("vehicle_id"): str, vol.Optional("entry_id"): str}
+
+
+class EvccUserView:
+    """Vorberechnete Ansicht der Pläne im User-Format (Wochentage 1-7) pro Fahrzeug.
+
+    Wird bei jedem Plan-Diff des Hubs nur für die betroffenen Fahrzeuge neu
+    gebaut. Lesende Kommandos geben die Objekte direkt aus; sie dürfen daher
+    nicht verändert werden.
     """
-    if not weekdays:
-        return weekdays
-    converted = []
-    for day in weekdays:
-        if isinstance(day, int):
-            # 7 (Sonntag) → 0, sonst unverändert
-            converted.append(0 if day == 7 else day)
-        else:
-            converted.append(day)
-    return converted
-
-
-@websocket_api.websocket_command({"type": "scheduler/get"})
+
+    def __init__(self, coordinator: Any, entry_id: str) -> None:
+        self.coordinator = coordinator
+        self.entry_id = entry_id
+        self.vehicles: Dict[str, Dict[str, Any]] = {}
+        self.rebuilds = 0
+
+    def async_start(self) -> Callable[[], None]:
+        """Ansicht aufbauen und am Hub registrieren; gibt die Abmeldefunktion zurück."""
+        unsub = self.coordinator.plan_sync.async_add_diff_listener(self._handle_diff)
+        for vehicle_id in ((self.coordinator.data or {}).get("vehicles") or {}):
+            self._rebuild(vehicle_id)
+        return unsub
+
+    @callback
+    def _handle_diff(self, diff: Any) -> None:
+        for vehicle_id in diff.vehicles:
+            self._rebuild(vehicle_id)
+
+    def _rebuild(self, vehicle_id: str) -> None:
+        vdata = ((self.coordinator.data or {}).get("vehicles") or {}).get(vehicle_id)
+        if vdata is None:
+            self.vehicles.pop(vehicle_id, None)
+            return
+        self.vehicles[vehicle_id] = {
+            "entry_id": self.entry_id,
+            "vehicle_id": vehicle_id,
+            "title": vdata.get("title"),
+            "repeatingPlans": plans_to_user(vdata.get("repeatingPlans", ())),
+        }
+        self.rebuilds += 1
+
+
+def _selected_coordinators(hass: HomeAssistant, msg: Dict[str, Any]) -> Dict[str, Any]:
+    router = _get_router(hass)
+    if "entry_id" in msg:
+        return dict([router.resolve_entry(msg["entry_id"])])
+    return dict(router.coordinators)
+
+
+def _build_vehicles_view(coordinators: Dict[str, Any]) -> Dict[str, Any]:
+    """Fahrzeuge und Pläne aller Coordinators im User-Format (aus den Ansichten)."""
+    if len(coordinators) == 1:
+        # Häufigster Fall: eine EVCC-Instanz → Ansicht ohne Kopie ausliefern
+        return next(iter(coordinators.values())).user_view.vehicles
+
+    result_vehicles = {}
+    for entry_id, coordinator in coordinators.items():
+        for vid, view in coordinator.user_view.vehicles.items():
+            # Gleiche ID auf mehreren EVCC-Instanzen → Schlüssel um entry_id ergänzen
+            result_vehicles[vid if vid not in result_vehicles else f"{vid}@{entry_id}"] = view
+    return result_vehicles
+
+
+@websocket_api.websocket_command({"type": "scheduler/get", vol.Optional("entry_id"): str})
 @websocket_api.async_response
 async def ws_get_scheduler(hass: HomeAssistant, connection, msg) -> None:
-    """Gib aktuelle repeatingPlans für das aktiv ausgewählte EVCC-Fahrzeug zurück."""
+    """Gib aktuelle repeatingPlans aller (oder eines Eintrags) EVCC-Fahrzeuge zurück."""
     try:
-        coordinator = _get_coordinator(hass)
-        data = coordinator.data or {}
-        vehicles = data.get("vehicles", {})
-        
-        # Konvertiere Wochentage für User (EVCC 0-6 → User 1-7)
-        result_vehicles = {}
-        for vid, vdata in vehicles.items():
-            result_vehicles[vid] = {
-                "title": vdata.get("title"),
-                "repeatingPlans": [
-                    {**plan, "weekdays": _convert_weekdays_to_user(plan.get("weekdays"))}
-                    for plan in vdata.get("repeatingPlans", [])
-                ]
+        vehicles = _build_vehicles_view(_selected_coordinators(hass, msg))
+        connection.send_result(msg["id"], {"vehicles": vehicles})
+    except Exception as err:
+        connection.send_error(msg["id"], "failed", str(err))
+
+
+def _build_vehicle_diffs(entry_id: str, coordinator: Any, diff: Any) -> List[Dict[str, Any]]:
+    """Zerlege einen Plan-Diff des Hubs in eine Nachricht pro Fahrzeug.
+
+    Indizes sind 1-basiert wie bei scheduler/edit. Anwenden in der Reihenfolge
+    removed → changed → added; geänderte Pläne enthalten nur die geänderten
+    Felder (entfernte Felder mit Wert None). Jedes Fahrzeug aus `diff.vehicles`
+    bekommt eine Nachricht, auch ohne Plan-Änderung (neues Fahrzeug ohne
+    Pläne, neuer Titel, entferntes Fahrzeug); unbekannte Fahrzeuge legt der
+    Subscriber an, bei `vehicle_removed` entfernt er sie.
+    """
+    vehicles = (coordinator.data or {}).get("vehicles") or {}
+    messages: Dict[str, Dict[str, Any]] = {}
+
+    def _message(vehicle_id: str) -> Dict[str, Any]:
+        message = messages.get(vehicle_id)
+        if message is None:
+            vehicle = vehicles.get(vehicle_id)
+            message = messages[vehicle_id] = {
+                "type": "vehicle_diff",
+                "entry_id": entry_id,
+                "vehicle_id": vehicle_id,
+                "title": vehicle.get("title") if vehicle else None,
+                "vehicle_removed": vehicle is None,
+                "removed": [],
+                "changed": [],
+                "added": [],
             }
-        
-        connection.send_result(msg["id"], {"vehicles": result_vehicles})
+        return message
+
+    for ref in diff.removed:
+        _message(ref.vehicle_id)["removed"].append(ref.index)
+    for ref in diff.changed:
+        old = diff.previous[ref.base_id].to_user() if ref.base_id in diff.previous else {}
+        new = ref.plan.to_user()
+        fields = {key: value for key, value in new.items() if old.get(key) != value}
+        fields.update({key: None for key in old if key not in new})
+        _message(ref.vehicle_id)["changed"].append({"plan_index": ref.index, "fields": fields})
+    for ref in diff.added:
+        _message(ref.vehicle_id)["added"].append({"plan_index": ref.index, "plan": ref.plan.to_user()})
+
+    for vehicle_id in diff.vehicles:
+        _message(vehicle_id)
+
+    for message in messages.values():
+        message["removed"].sort(reverse=True)
+    return list(messages.values())
+
+
+@websocket_api.websocket_command({"type": "scheduler/subscribe", vol.Optional("entry_id"): str})
+@callback
+def ws_subscribe_scheduler(hass: HomeAssistant, connection, msg) -> None:
+    """Sende einen Snapshot und danach nur noch Änderungen pro Fahrzeug."""
+    try:
+        coordinators = _selected_coordinators(hass, msg)
     except Exception as err:
         connection.send_error(msg["id"], "failed", str(err))
+        return
+
+    msg_id = msg["id"]
+    unsubs = []
+    for entry_id, coordinator in coordinators.items():
+
+        @callback
+        def _forward(diff: Any, entry_id: str = entry_id, coordinator: Any = coordinator) -> None:
+            for message in _build_vehicle_diffs(entry_id, coordinator, diff):
+                connection.send_message(websocket_api.event_message(msg_id, message))
+
+        unsubs.append(coordinator.plan_sync.async_add_diff_listener(_forward))
+
+    @callback
+    def _unsubscribe() -> None:
+        for unsub in unsubs:
+            unsub()
+
+    connection.subscriptions[msg_id] = _unsubscribe
+    connection.send_result(msg_id)
+    connection.send_message(websocket_api.event_message(
+        msg_id, {"type": "snapshot", "vehicles": _build_vehicles_view(coordinators)}
+    ))
 
 
-@websocket_api.websocket_command({"type": "scheduler/add"})
+def _plan_fields_from_msg(msg: Dict[str, Any]) -> Dict[str, Any]:
+    """RepeatingPlan-Felder aus einem Kommando (weekdays: 1=Montag, 7=Sonntag)."""
+    fields = {key: msg[key] for key in ("soc", "active") if key in msg}
+    if "time" in msg:
+        fields["time"] = parse_time(msg["time"])
+    if "weekdays" in msg:
+        fields["weekdays"] = weekdays_to_mask(msg["weekdays"], user=True)
+    return fields
+
+
+async def _async_mutate_and_respond(hass: HomeAssistant, connection, msg, mutate: Callable) -> None:
+    """Änderung über die Mutation-Queue schreiben, Ergebnis senden und broadcasten."""
+    entry_id, coordinator, vehicle_id = _resolve_target(hass, msg)
+    plans = await coordinator.mutation_queue.async_mutate(vehicle_id, mutate)
+
+    # Sind die bestätigten Pläne übernommen, ist die Ansicht bereits neu gebaut
+    current = ((coordinator.data or {}).get("vehicles") or {}).get(vehicle_id) or {}
+    if current.get("repeatingPlans") is plans and vehicle_id in coordinator.user_view.vehicles:
+        user_plans = coordinator.user_view.vehicles[vehicle_id]["repeatingPlans"]
+    else:
+        user_plans = plans_to_user(plans)
+
+    api = hass.data.get("evcc_scheduler_ws_api")
+    if api:
+        await api.broadcast({"type": "plans_updated", "entry_id": entry_id, "vehicle_id": vehicle_id, "plans": user_plans})
+
+    connection.send_result(msg["id"], {"entry_id": entry_id, "vehicle_id": vehicle_id, "plans": user_plans})
+
+
+def _check_plan_index(plans: list, plan_index: int) -> None:
+    if not (0 <= plan_index < len(plans)):
+        raise IndexError("plan_index out of range")
+
+
+@websocket_api.websocket_command({"type": "scheduler/add", **_TARGET_SCHEMA})
 @websocket_api.async_response
 async def ws_add_scheduler(hass: HomeAssistant, connection, msg) -> None:
     """Füge einen repeatingPlan hinzu (weekdays: 1=Montag, 7=Sonntag)."""
     try:
-        coordinator = _get_coordinator(hass)
-        data = coordinator.data or {}
-        vehicles = data.get("vehicles", {})
-        
-        # Hole die vehicle_id des aktuell geladenen Fahrzeugs
-        if not vehicles:
-            raise ValueError("Kein Fahrzeug geladen")
-        
-        vehicle_id = next(iter(vehicles.keys()))
-        plans = await coordinator.api.get_repeating_plans(vehicle_id)
-
-        new_plan = {}
-        for key in ("time", "soc", "active"):
-            if key in msg:
-                new_plan[key] = msg[key]
-        # Konvertiere Wochentage: User 1-7 → EVCC 0-6
-        if "weekdays" in msg:
-            new_plan["weekdays"] = _convert_weekdays_to_api(msg["weekdays"])
-
-        plans.append(new_plan)
-        await coordinator.api.set_repeating_plans(vehicle_id, plans)
-
-        # Konvertiere Pläne zurück zu User-Format für Response/Broadcast
-        user_plans = [
-            {**plan, "weekdays": _convert_weekdays_to_user(plan.get("weekdays"))}
-            for plan in plans
-        ]
-        
-        # Sofort Update (nicht blockierend)
-        updated_data = coordinator.data or {}
-        updated_vehicles = updated_data.get("vehicles", {}).copy()
-        updated_vehicles[vehicle_id] = {
-            "title": updated_vehicles.get(vehicle_id, {}).get("title", vehicle_id),
-            "repeatingPlans": plans
-        }
-        coordinator.async_set_updated_data({"vehicles": updated_vehicles, "id_map": coordinator.id_map})
-        
-        # Trigger Refresh im Hintergrund
-        coordinator.async_request_refresh()
-        
-        # Broadcast sofort nach lokaler Update
-        api = hass.data.get("evcc_scheduler_ws_api")
-        if api:
-            api.broadcast({"type": "plans_updated", "vehicle_id": vehicle_id, "plans": user_plans})
+        new_plan = RepeatingPlan(**_plan_fields_from_msg(msg))
+
+        def _add(plans: list) -> None:
+            plans.append(new_plan)
 
-        connection.send_result(msg["id"], {"vehicle_id": vehicle_id, "plans": user_plans})
+        await _async_mutate_and_respond(hass, connection, msg, _add)
     except Exception as err:
         connection.send_error(msg["id"], "failed", str(err))
 
 
-@websocket_api.websocket_command({"type": "scheduler/edit", "plan_index": int})
+@websocket_api.websocket_command({"type": "scheduler/edit", "plan_index": int, **_TARGET_SCHEMA})
 @websocket_api.async_response
 async def ws_edit_scheduler(hass: HomeAssistant, connection, msg) -> None:
     """Bearbeite einen repeatingPlan (plan_index: 1-basiert, weekdays: 1=Montag, 7=Sonntag)."""
     try:
-        coordinator = _get_coordinator(hass)
-        data = coordinator.data or {}
-        vehicles = data.get("vehicles", {})
-        
-        # Hole die vehicle_id des aktuell geladenen Fahrzeugs
-        if not vehicles:
-            raise ValueError("Kein Fahrzeug geladen")
-        
-        vehicle_id = next(iter(vehicles.keys()))
         plan_index = msg["plan_index"] - 1  # Konvertiere 1-basiert zu 0-basiert
+        fields = _plan_fields_from_msg(msg)
 
-        plans = await coordinator.api.get_repeating_plans(vehicle_id)
-        if not (0 <= plan_index < len(plans)):
-            raise IndexError("plan_index out of range")
-
-        for key in ("time", "soc", "active"):
-            if key in msg:
-                plans[plan_index][key] = msg[key]
-        # Konvertiere Wochentage: User 1-7 → EVCC 0-6
-        if "weekdays" in msg:
-            plans[plan_index]["weekdays"] = _convert_weekdays_to_api(msg["weekdays"])
-
-        await coordinator.api.set_repeating_plans(vehicle_id, plans)
-
-        # Konvertiere Pläne zurück zu User-Format für Response/Broadcast
-        user_plans = [
-            {**plan, "weekdays": _convert_weekdays_to_user(plan.get("weekdays"))}
-            for plan in plans
-        ]
-        
-        # Sofort Update (nicht blockierend)
-        updated_data = coordinator.data or {}
-        updated_vehicles = updated_data.get("vehicles", {}).copy()
-        updated_vehicles[vehicle_id] = {
-            "title": updated_vehicles.get(vehicle_id, {}).get("title", vehicle_id),
-            "repeatingPlans": plans
-        }
-        coordinator.async_set_updated_data({"vehicles": updated_vehicles, "id_map": coordinator.id_map})
-        
-        # Trigger Refresh im Hintergrund
-        coordinator.async_request_refresh()
-        
-        # Broadcast sofort nach lokaler Update
-        api = hass.data.get("evcc_scheduler_ws_api")
-        if api:
-            api.broadcast({"type": "plans_updated", "vehicle_id": vehicle_id, "plans": user_plans})
+        def _edit(plans: list) -> None:
+            _check_plan_index(plans, plan_index)
+            plans[plan_index] = plans[plan_index].with_fields(**fields)
 
-        connection.send_result(msg["id"], {"vehicle_id": vehicle_id, "plans": user_plans})
+        await _async_mutate_and_respond(hass, connection, msg, _edit)
     except Exception as err:
         connection.send_error(msg["id"], "failed", str(err))
 
 
-@websocket_api.websocket_command({"type": "scheduler/deleate", "plan_index": int})
+@websocket_api.websocket_command({"type": "scheduler/deleate", "plan_index": int, **_TARGET_SCHEMA})
 @websocket_api.async_response
 async def ws_delete_scheduler(hass: HomeAssistant, connection, msg) -> None:
     """Lösche einen repeatingPlan (plan_index: 1-basiert)."""
     try:
-        coordinator = _get_coordinator(hass)
-        data = coordinator.data or {}
-        vehicles = data.get("vehicles", {})
-        
-        # Hole die vehicle_id des aktuell geladenen Fahrzeugs
-        if not vehicles:
-            raise ValueError("Kein Fahrzeug geladen")
-        
-        vehicle_id = next(iter(vehicles.keys()))
         plan_index = msg["plan_index"] - 1  # Konvertiere 1-basiert zu 0-basiert
 
-        plans = await coordinator.api.get_repeating_plans(vehicle_id)
-        if not (0 <= plan_index < len(plans)):
-            raise IndexError("plan_index out of range")
-
-        plans.pop(plan_index)
-        await coordinator.api.set_repeating_plans(vehicle_id, plans)
-
-        # Konvertiere Pläne zurück zu User-Format für Response/Broadcast
-        user_plans = [
-            {**plan, "weekdays": _convert_weekdays_to_user(plan.get("weekdays"))}
-            for plan in plans
-        ]
-        
-        # Sofort Update (nicht blockierend)
-        updated_data = coordinator.data or {}
-        updated_vehicles = updated_data.get("vehicles", {}).copy()
-        updated_vehicles[vehicle_id] = {
-            "title": updated_vehicles.get(vehicle_id, {}).get("title", vehicle_id),
-            "repeatingPlans": plans
-        }
-        coordinator.async_set_updated_data({"vehicles": updated_vehicles, "id_map": coordinator.id_map})
-        
-        # Trigger Refresh im Hintergrund
-        coordinator.async_request_refresh()
-        
-        # Broadcast sofort nach lokaler Update
-        api = hass.data.get("evcc_scheduler_ws_api")
-        if api:
-            api.broadcast({"type": "plans_updated", "vehicle_id": vehicle_id, "plans": user_plans})
+        def _delete(plans: list) -> None:
+            _check_plan_index(plans, plan_index)
+            plans.pop(plan_index)
 
-        connection.send_result(msg["id"], {"vehicle_id": vehicle_id, "plans": user_plans})
+        await _async_mutate_and_respond(hass, connection, msg, _delete)
     except Exception as err:
         connection.send_error(msg["id"], "failed", str(err))
 
@@ -323,6 +426,7 @@ async def ws_delete_scheduler(hass: HomeAssistant, connection, msg) -> None:
 def async_register_ws_commands(hass: HomeAssistant) -> None:
     """Registriere die HA-WS-Kommandos."""
     websocket_api.async_register_command(hass, ws_get_scheduler)
+    websocket_api.async_register_command(hass, ws_subscribe_scheduler)
     websocket_api.async_register_command(hass, ws_add_scheduler)
     websocket_api.async_register_command(hass, ws_edit_scheduler)
     websocket_api.async_register_command(hass, ws_delete_scheduler)
@@ -2,21 +2,147 @@ import asyncio
 import json
 import logging
 import random
-import re
+import time
+from typing import Callable
 import websockets
+from . import codec
+from .metrics import EvccMetrics
+from .profiler import EvccProfiler
+from .ws_classifier import CATEGORY_FULL_STATE, CATEGORY_IGNORE, DEFAULT_RULES, EvccMessageClassifier
 
 _LOGGER = logging.getLogger(__name__)
 
+# Dedup-Schlüssel für vollständige State-Nachrichten (ohne "path")
+STATE_DEDUP_KEY = "__state__"
+
+# Obergrenze für unterschiedliche Schlüssel im Coalescing-Puffer (Sicherheitsnetz)
+DEFAULT_BUFFER_MAX_KEYS = 64
+
+
+class EvccCoalescingBuffer:
+    """Nachrichtenpuffer mit "latest wins" pro Schlüssel (Kategorie + Pfad).
+
+    Der Pfad gehört zum Schlüssel, weil z.B. title- und name-Frames desselben
+    Fahrzeugs dieselbe Kategorie haben, sich aber nicht gegenseitig ersetzen dürfen.
+
+    Eine neuere Nachricht ersetzt die wartende Nachricht desselben Schlüssels
+    und rückt ans Ende, damit die Reihenfolge zwischen Schlüsseln (z.B.
+    Vollstate vs. Plan-Delta) erhalten bleibt. Der Speicher ist dadurch durch
+    die Anzahl der Schlüssel begrenzt; verworfen wird nur, wenn `max_keys`
+    überschritten wird (dann die älteste Nachricht).
+    """
+
+    def __init__(self, max_keys: int = DEFAULT_BUFFER_MAX_KEYS) -> None:
+        self.max_keys = max_keys
+        self._items: dict = {}
+        self._event = asyncio.Event()
+        self.replaced = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def put(self, key, item) -> None:
+        if self._items.pop(key, None) is not None:
+            self.replaced += 1
+        elif len(self._items) >= self.max_keys:
+            oldest = next(iter(self._items))
+            del self._items[oldest]
+            self.dropped += 1
+            _LOGGER.warning("WS buffer full; dropping oldest message for %s", oldest)
+        self._items[key] = item
+        self.max_depth = max(self.max_depth, len(self._items))
+        self._event.set()
+
+    async def get(self):
+        while not self._items:
+            self._event.clear()
+            await self._event.wait()
+        key = next(iter(self._items))
+        return self._items.pop(key)
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+class EvccMessageDeduplicator:
+    """Unterdrückt doppelte WS-Nachrichten pro Pfad.
+
+    Statt jede Nachricht mit json.dumps(sort_keys=True) zu serialisieren, wird
+    der Hash des rohen Frames je Pfad gemerkt. Jeder empfangene Frame ist ein
+    neues str-Objekt; der Hash kostet also einen linearen Durchlauf, aber
+    kein Parsen oder Serialisieren.
+    Dadurch werden Duplikate auch bei abwechselnden Pfaden erkannt.
+
+    Gemerkt wird erst mit `remember`, wenn der Frame weitergereicht wurde.
+    Ändert sich der Cache auf anderem Weg (POST-Antwort, Refresh), muss
+    `invalidate` aufgerufen werden, sonst würde ein Frame, der den alten Wert
+    wiederherstellt, fälschlich als Duplikat verworfen.
+    """
+
+    def __init__(self) -> None:
+        # Pfad → (vehicle_id, Hash des Frames)
+        self._last: dict[str, tuple[str | None, int]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def is_duplicate(self, key: str, raw) -> bool:
+        """Prüfe, ob der Frame dem zuletzt gemerkten Wert dieses Pfads entspricht."""
+        last = self._last.get(key)
+        if last is not None and last[1] == hash(raw):
+            self.hits += 1
+            return True
+        self.misses += 1
+        return False
+
+    def remember(self, key: str, raw, vehicle_id: str | None = None) -> None:
+        """Merke den Frame als aktuellen Wert dieses Pfads."""
+        # hash() von str/bytes ist nach is_duplicate am Objekt gecacht
+        self._last[key] = (vehicle_id, hash(raw))
+
+    def invalidate(self, vehicle_id: str | None = None) -> None:
+        """Vergiss die Werte eines Fahrzeugs (ohne vehicle_id: alle)."""
+        if vehicle_id is None:
+            self._last.clear()
+            return
+        self._last = {key: last for key, last in self._last.items() if last[0] != vehicle_id}
+
+    def clear(self) -> None:
+        """Vergiss alle gespeicherten Werte (z.B. nach einem Reconnect)."""
+        self._last.clear()
+
+
 class EvccWebsocketClient:
-    def __init__(self, host, port, coordinator_callback):
+    def __init__(
+        self,
+        host,
+        port,
+        coordinator_callback,
+        reconnect_callback=None,
+        classifier_rules=DEFAULT_RULES,
+        metrics: EvccMetrics | None = None,
+        profiler: EvccProfiler | None = None,
+        status_callback: Callable[[bool], None] | None = None,
+    ):
         self.url = f"ws://{host}:{port}/ws"
         self.coordinator_callback = coordinator_callback
+        self.reconnect_callback = reconnect_callback
+        # Wird bei Verbindungsauf-/abbau mit dem neuen Zustand aufgerufen (adaptives Polling)
+        self.status_callback = status_callback
+        # Zeitpunkt (monotonic) des letzten empfangenen Frames
+        self.last_frame_at: float | None = None
+        self._connected_once = False
+        self._reconnect_task = None
         self._task = None
         self._consumer_task = None
         self._ws = None
         self._running = False
-        self._message_queue: asyncio.Queue = asyncio.Queue(maxsize=100)
-        self._last_signature: str | None = None
+        self._buffer = EvccCoalescingBuffer()
+        self._dedup = EvccMessageDeduplicator()
+        self._classifier = EvccMessageClassifier(classifier_rules)
+        self.metrics = metrics or EvccMetrics()
+        self.profiler = profiler or EvccProfiler()
 
         # Backoff-Konfiguration
         self._backoff_base = 1
@@ -39,7 +165,7 @@ class EvccWebsocketClient:
             except Exception as err:
                 _LOGGER.debug("Error during websocket close: %s", err)
 
-        for task in (self._task, self._consumer_task):
+        for task in (self._task, self._consumer_task, self._reconnect_task):
             if task and not task.done():
                 task.cancel()
                 try:
@@ -51,8 +177,10 @@ class EvccWebsocketClient:
 
         self._task = None
         self._consumer_task = None
-        self._ws = None
-        self._clear_queue()
+        self._reconnect_task = None
+        self._connected_once = False
+        self._set_ws(None)
+        self._buffer.clear()
 
     async def _run(self):
         backoff = self._backoff_base
@@ -65,28 +193,42 @@ class EvccWebsocketClient:
                     ping_timeout=10,
                     max_size=1_000_000,
                 ) as ws:
-                    self._ws = ws
+                    self._set_ws(ws)
                     _LOGGER.info("Connected to EVCC websocket at %s", self.url)
                     backoff = self._backoff_base  # Reset nach erfolgreichem Connect
 
+                    # Nach einem Reconnect ist der Cache ggf. veraltet → Full-Refresh anstoßen
+                    if self._connected_once:
+                        self.metrics.ws_reconnects += 1
+                        if self.reconnect_callback:
+                            self._reconnect_task = asyncio.create_task(self.reconnect_callback())
+                    self._connected_once = True
+
                     async for msg in ws:
+                        self.metrics.ws_frames_received += 1
+                        self.last_frame_at = time.monotonic()
                         try:
-                            data = json.loads(msg)
+                            with self.profiler.span("ws_decode"):
+                                data = codec.loads(msg)
                             
                             # Filtere relevante Nachrichten für sofortiges Update
                             # EVCC sendet verschiedene Event-Typen
-                            if self._is_relevant_update(data):
-                                _LOGGER.debug("Relevant WS message received, triggering coordinator refresh")
-                                signature = self._signature(data)
-                                if signature == self._last_signature:
-                                    _LOGGER.debug("Skipping duplicate WS message")
+                            with self.profiler.span("ws_classify"):
+                                category, vehicle_id = self._classifier.classify(data)
+                            if category != CATEGORY_IGNORE:
+                                self.metrics.ws_frames_relevant += 1
+                                _LOGGER.debug("Relevant WS message (%s) received, forwarding to coordinator", category)
+                                dedup_key = data.get("path") or STATE_DEDUP_KEY
+                                if self._dedup.is_duplicate(dedup_key, msg):
+                                    _LOGGER.debug("Skipping duplicate WS message for %s", dedup_key)
                                     continue
-                                self._last_signature = signature
 
-                                if not self._message_queue.full():
-                                    await self._message_queue.put(data)
-                                else:
-                                    _LOGGER.warning("WS message queue full; dropping message")
+                                # Neuere Nachricht ersetzt eine noch wartende desselben Pfads
+                                self._buffer.put((category, dedup_key), data)
+                                if category == CATEGORY_FULL_STATE:
+                                    # Vollstate ersetzt alle Pfadwerte im Cache
+                                    self._dedup.invalidate()
+                                self._dedup.remember(dedup_key, msg, vehicle_id)
                         except json.JSONDecodeError:
                             _LOGGER.debug("Non-JSON websocket message ignored")
                         except Exception as e:
@@ -94,6 +236,8 @@ class EvccWebsocketClient:
 
             except websockets.exceptions.WebSocketException as e:
                 _LOGGER.warning("Websocket connection error: %s", e)
+                # Schon vor dem Backoff als getrennt melden (Coordinator pollt wieder)
+                self._set_ws(None)
                 sleep_for = self._next_backoff(backoff)
                 _LOGGER.debug("Backoff after WS error: %.2fs", sleep_for)
                 await asyncio.sleep(sleep_for)
@@ -103,83 +247,70 @@ class EvccWebsocketClient:
                 break
             except Exception as e:
                 _LOGGER.warning("Websocket error: %s", e)
+                # Schon vor dem Backoff als getrennt melden (Coordinator pollt wieder)
+                self._set_ws(None)
                 sleep_for = self._next_backoff(backoff)
                 _LOGGER.debug("Backoff after WS error: %.2fs", sleep_for)
                 await asyncio.sleep(sleep_for)
                 backoff = min(backoff * 2, self._backoff_max)
             finally:
-                self._ws = None
-                self._last_signature = None
+                self._set_ws(None)
+                self._dedup.clear()
 
     async def _consume_messages(self):
-        while self._running or not self._message_queue.empty():
+        while self._running or len(self._buffer):
             try:
-                data = await self._message_queue.get()
+                data = await self._buffer.get()
                 await self.coordinator_callback(data)
             except asyncio.CancelledError:
                 _LOGGER.debug("Consumer task cancelled")
                 break
             except Exception as err:
                 _LOGGER.error("Error in consumer task: %s", err)
-            finally:
-                self._message_queue.task_done()
 
-    def _clear_queue(self):
-        while not self._message_queue.empty():
+    def _set_ws(self, ws) -> None:
+        was_connected = self._ws is not None
+        self._ws = ws
+        if ws is not None:
+            # Verbindungsaufbau zählt als Lebenszeichen
+            self.last_frame_at = time.monotonic()
+        # Beim gewollten Trennen (disconnect) nicht melden
+        if self.status_callback and self._running and was_connected != (ws is not None):
             try:
-                self._message_queue.get_nowait()
-                self._message_queue.task_done()
-            except asyncio.QueueEmpty:
-                break
+                self.status_callback(ws is not None)
+            except Exception as err:
+                _LOGGER.error("Error in websocket status callback: %s", err)
 
     def _next_backoff(self, current: int) -> float:
         jitter = random.uniform(0, current)
         return min(current + jitter, self._backoff_max)
     
-    def _is_relevant_update(self, data: dict) -> bool:
-        """Prüfe ob die WS-Nachricht für den Scheduler relevant ist.
-        
-        Filtert nur KRITISCHE Updates heraus, um unnötige Coordinator-Refreshes zu vermeiden.
-        Ignoriert General-Updates (wie Fehler, Netzwerk-Status, etc.).
-        """
-        if not isinstance(data, dict):
+    @property
+    def connected(self) -> bool:
+        """Besteht aktuell eine WebSocket-Verbindung zu EVCC?"""
+        return self._ws is not None
+
+    def delivering(self, silence_timeout: float) -> bool:
+        """Verbunden und innerhalb von `silence_timeout` Sekunden einen Frame empfangen?"""
+        if not self.connected or self.last_frame_at is None:
             return False
-        
-        # KRITISCH: Vollständiges State-Update (enthält vehicles + loadpoints)
-        # Dies ist selten, aber wenn EVCC neuen Gesamtstate sendet, müssen wir updaten
-        if "vehicles" in data and "loadpoints" in data:
-            _LOGGER.debug("Full state update detected from WS")
-            return True
-        
-        # KRITISCH: Vehicle/Plan-spezifische Updates (path-basiert)
-        path = data.get("path", "")
+        return time.monotonic() - self.last_frame_at < silence_timeout
 
-        # Plan-Änderungen sind DRINGEND (präziser Pfad-Check)
-        if self._matches_plan_path(path):
-            _LOGGER.debug("Plan change detected in WS path: %s", path)
-            return True
-        
-        # Vehicle-Name/Title-Änderungen sind WICHTIG (Fahrzeugwechsel)
-        if "/vehicles/" in path and ("title" in path or "name" in path):
-            _LOGGER.debug("Vehicle name/title change detected: %s", path)
-            return True
-        
-        # Aktives Fahrzeug in Ladestation geändert
-        if "vehicleName" in path or "activeVehicle" in path:
-            _LOGGER.debug("Active vehicle changed: %s", path)
-            return True
-        
-        # Alles andere ignorieren (Status-Updates, Netzwerk-Infos, etc.)
-        return False
+    def invalidate_dedup(self, vehicle_id: str | None = None) -> None:
+        """Cache wurde ohne WS geändert; gemerkte Frames (des Fahrzeugs) verwerfen."""
+        self._dedup.invalidate(vehicle_id)
 
-    def _matches_plan_path(self, path: str) -> bool:
-        if not path:
-            return False
-        pattern = r"^/api/vehicles/[^/]+/plan/repeating"
-        return re.match(pattern, path) is not None
-
-    def _signature(self, data: dict) -> str:
-        try:
-            return json.dumps(data, sort_keys=True)
-        except Exception:
-            return str(data)
+    @property
+    def dedup_stats(self) -> dict:
+        """Treffer (unterdrückte Duplikate) und Fehlschläge des Dedup-Layers."""
+        return {"hits": self._dedup.hits, "misses": self._dedup.misses}
+
+    @property
+    def buffer_stats(self) -> dict:
+        """Aktuelle/maximale Tiefe sowie ersetzte und verworfene Nachrichten."""
+        return {
+            "depth": len(self._buffer),
+            "max_depth": self._buffer.max_depth,
+            "replaced": self._buffer.replaced,
+            "dropped": self._buffer.dropped,
+        }
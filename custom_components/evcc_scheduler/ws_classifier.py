@@ -0,0 +1,89 @@
+"""Vorkompilierter Klassifizierer für EVCC-WebSocket-Nachrichten."""
+import re
+from typing import Any, Iterable, Tuple
+
+CATEGORY_PLAN = "plan"
+CATEGORY_TITLE = "title"
+CATEGORY_ACTIVE_VEHICLE = "active_vehicle"
+CATEGORY_FULL_STATE = "full_state"
+CATEGORY_IGNORE = "ignore"
+
+# Regeltabelle (Kategorie, Pfad-Regex). Die Regexe werden ab Pfadanfang geprüft;
+# bei mehreren Treffern gewinnt die erste Regel. Eine benannte Gruppe
+# "vehicle_id" liefert die betroffene Fahrzeug-ID.
+DEFAULT_RULES: Tuple[Tuple[str, str], ...] = (
+    (CATEGORY_PLAN, r"/api/vehicles/(?P<vehicle_id>[^/]+)/plan/repeating"),
+    (CATEGORY_TITLE, r".*/vehicles/(?P<vehicle_id>[^/]+).*(?:title|name)"),
+    (CATEGORY_ACTIVE_VEHICLE, r".*(?:vehicleName|activeVehicle)"),
+)
+
+# Mindestens eines dieser Wörter muss im Pfad vorkommen, sonst wird die Regex
+# gar nicht erst ausgeführt (der Großteil der Frames sind Leistungswerte).
+# Passt nur zu DEFAULT_RULES; eigene Regeln laufen ohne Vorfilter.
+DEFAULT_KEYWORDS: Tuple[str, ...] = ("vehicle", "Vehicle")
+
+_IGNORED: Tuple[str, None] = (CATEGORY_IGNORE, None)
+
+
+class EvccMessageClassifier:
+    """Ordnet eine WS-Nachricht in einem Durchlauf einer Kategorie zu.
+
+    Alle Regeln werden zu einer einzigen Alternation kompiliert; die
+    Kategorie ergibt sich aus der äußeren Gruppe, die getroffen hat.
+    """
+
+    def __init__(
+        self,
+        rules: Iterable[Tuple[str, str]] = DEFAULT_RULES,
+        keywords: Iterable[str] | None = None,
+    ) -> None:
+        self.rules = tuple(rules)
+        # Ohne Angabe: Vorfilter nur für die Standardregeln, eigene Regeln
+        # könnten sonst Pfade ohne gemeinsames Stichwort verlieren
+        if keywords is None and self.rules == DEFAULT_RULES:
+            keywords = DEFAULT_KEYWORDS
+        self.keywords = tuple(keywords) if keywords is not None else None
+        self._categories: dict[str, str] = {}
+        self._vehicle_groups: dict[str, str] = {}
+
+        alternatives = []
+        for idx, (category, pattern) in enumerate(self.rules):
+            group = f"r{idx}"
+            vehicle_group = f"{group}_vehicle_id"
+            # Gruppennamen müssen in der Alternation eindeutig sein
+            pattern = pattern.replace("(?P<vehicle_id>", f"(?P<{vehicle_group}>")
+            alternatives.append(f"(?P<{group}>{pattern})")
+            self._categories[group] = category
+            if f"(?P<{vehicle_group}>" in pattern:
+                self._vehicle_groups[group] = vehicle_group
+
+        self._pattern = re.compile("|".join(alternatives)) if alternatives else None
+
+    def classify(self, data: Any) -> Tuple[str, str | None]:
+        """Gib (Kategorie, vehicle_id) für eine dekodierte Nachricht zurück."""
+        if not isinstance(data, dict):
+            return _IGNORED
+
+        # Vollständiges State-Update (enthält vehicles + loadpoints)
+        if "vehicles" in data and "loadpoints" in data:
+            return CATEGORY_FULL_STATE, None
+
+        path = data.get("path")
+        if not path or self._pattern is None or not isinstance(path, str):
+            return _IGNORED
+        if self.keywords is not None:
+            # Schleife statt any(): spart den Generator pro Frame
+            for keyword in self.keywords:
+                if keyword in path:
+                    break
+            else:
+                return _IGNORED
+
+        match = self._pattern.match(path)
+        if match is None:
+            return _IGNORED
+
+        group = match.lastgroup
+        vehicle_group = self._vehicle_groups.get(group)
+        vehicle_id = match.group(vehicle_group) if vehicle_group else None
+        return self._categories[group], vehicle_id
@@ -0,0 +1,35 @@
+"""Tests für BaseEvccPlanEntity: State-Writes nur über den Plan-Diff."""
+from unittest.mock import MagicMock
+
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.evcc_scheduler.base_entity import BaseEvccPlanEntity
+from custom_components.evcc_scheduler.models import RepeatingPlan
+
+
+def _entity() -> BaseEvccPlanEntity:
+    coordinator = MagicMock()
+    coordinator.last_update_success = True
+    entity = BaseEvccPlanEntity(coordinator, "db:1", 1, RepeatingPlan(soc=80), "Model 3")
+    entity.async_write_ha_state = MagicMock()
+    return entity
+
+
+def test_coordinator_update_does_not_write_unchanged_entity():
+    entity = _entity()
+
+    entity._handle_coordinator_update()
+
+    entity.async_write_ha_state.assert_not_called()
+
+
+def test_coordinator_update_writes_on_availability_change():
+    entity = _entity()
+
+    entity.coordinator.last_update_success = False
+    entity._handle_coordinator_update()
+    entity._handle_coordinator_update()
+
+    entity.async_write_ha_state.assert_called_once()
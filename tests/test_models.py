@@ -0,0 +1,36 @@
+"""Tests für das Plan-Modell RepeatingPlan."""
+import pytest
+
+pytest.importorskip("homeassistant")
+
+from custom_components.evcc_scheduler.models import RepeatingPlan
+
+PLAN = {"time": "07:00", "weekdays": [0, 1, 6], "soc": 80, "active": True, "tz": "Europe/Berlin", "precondition": 0}
+
+
+def test_round_trip_is_lossless():
+    assert RepeatingPlan.from_evcc(PLAN).to_evcc() == PLAN
+
+
+def test_unknown_keys_and_values_are_kept():
+    raw = {**PLAN, "time": "7:5", "extra": {"a": [1]}}
+    assert RepeatingPlan.from_evcc(raw).to_evcc() == raw
+
+
+def test_unsorted_duplicate_weekdays_are_normalized():
+    plan = RepeatingPlan.from_evcc({**PLAN, "weekdays": [5, 1, 1]})
+
+    assert plan.to_evcc()["weekdays"] == [1, 5]
+    assert plan.user_weekdays == [1, 5]
+    assert plan.extras == ()
+
+
+def test_out_of_range_weekdays_are_kept_raw():
+    plan = RepeatingPlan.from_evcc({**PLAN, "weekdays": [1, 9]})
+
+    assert plan.weekdays is None
+    assert plan.to_evcc()["weekdays"] == [1, 9]
+
+
+def test_user_weekdays_map_sunday_to_seven():
+    assert RepeatingPlan.from_evcc(PLAN).to_user()["weekdays"] == [1, 6, 7]